@@ -3,19 +3,16 @@ Streamlit app for Spotify Playlist Enhancer.
 Provides a web interface for playlist analysis and management.
 """
 
+from __future__ import annotations
+
 import os
 import logging
-from typing import Dict, List, Optional, Tuple, Union, Any
+import functools
+from typing import Dict, List, Optional, Tuple, Union, Any, TYPE_CHECKING
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime
 import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from dotenv import load_dotenv
 import traceback
-import numpy as np
 
 from core import (
     TrackMetadata,
@@ -27,14 +24,19 @@ from core import (
     fetch_artist_genres,
     init_spotify_client,
     shuffle_playlist,
-    export_analysis,
+    build_analysis_export,
     get_playlist_recommendations,
     get_audio_analysis,
     get_artist_details
 )
+from export import dumps_json
 
-# Load environment variables
-load_dotenv()
+# Heavy libraries are imported inside the functions that use them so the
+# page starts rendering before pandas/numpy/plotly are loaded
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import plotly.graph_objects as go
 
 # Configure logging
 logging.basicConfig(
@@ -50,6 +52,164 @@ st.set_page_config(
     layout="wide"
 )
 
+# Cache lifetime for Spotify API reads (seconds)
+CACHE_TTL = 3600
+
+# Cache lifetime for reads keyed on a playlist snapshot ID (seconds); the key
+# already changes when the playlist does, so this only bounds genre staleness
+SNAPSHOT_CACHE_TTL = 24 * 3600
+
+# Upper bound on entries kept per cached function, so browsing many playlists
+# doesn't grow the in-memory caches without limit
+CACHE_MAX_ENTRIES = 64
+
+# Audio features shown in the distribution grid, with their display titles
+AUDIO_FEATURE_PLOTS = [
+    ('tempo', 'Tempo (BPM)'),
+    ('energy', 'Energy'),
+    ('danceability', 'Danceability'),
+    ('valence', 'Valence'),
+    ('acousticness', 'Acousticness'),
+    ('instrumentalness', 'Instrumentalness'),
+    ('liveness', 'Liveness'),
+    ('speechiness', 'Speechiness')
+]
+
+# Audio features summarized as averages on the stats dashboard
+AVERAGE_METRICS = [
+    ('tempo', 'Average BPM'),
+    ('energy', 'Average Energy'),
+    ('danceability', 'Average Danceability')
+]
+
+# Number of bins used for audio feature histograms
+HISTOGRAM_BINS = 30
+
+# Audio feature columns and the compact dtypes they are stored as
+FLOAT_FEATURE_COLUMNS = [
+    'danceability', 'energy', 'loudness', 'speechiness', 'acousticness',
+    'instrumentalness', 'liveness', 'valence', 'tempo'
+]
+INT_FEATURE_COLUMNS = ['key', 'mode', 'time_signature']
+
+# Arrow-backed dtype used for the track table's text columns
+STRING_DTYPE = 'string[pyarrow]'
+
+# Rows sent to the browser per track table page
+TABLE_PAGE_SIZE = 200
+
+# Columns shown in the track table; raw API fields (uri, track_href, ...) stay server-side
+TABLE_COLUMNS = (
+    ['Name', 'Artist', 'Album', 'Duration', 'Popularity', 'Genres']
+    + FLOAT_FEATURE_COLUMNS
+    + INT_FEATURE_COLUMNS
+)
+
+# Text columns matched by the track table search box
+SEARCH_COLUMNS = ('Name', 'Artist', 'Album')
+
+# Table columns sorted by a different underlying column
+SORT_COLUMN_OVERRIDES = {'Duration': 'Duration (ms)'}
+
+@st.cache_resource(show_spinner=False)
+def get_spotify_client() -> spotipy.Spotify:
+    """
+    Create the Spotify client once per process and share it across reruns.
+    
+    cache_resource returns the same object without hashing or copying it; the
+    data caches below take it as ``_client`` so it is never hashed either.
+    """
+    client = init_spotify_client()
+    if client is None:
+        # Raising keeps the failure out of the resource cache
+        raise RuntimeError("Could not initialize Spotify client. Check your .env file.")
+    return client
+
+class UncachedResult(Exception):
+    """
+    Raised by a cached wrapper to hand back a result without caching it.
+    
+    st.cache_data stores nothing when the wrapped function raises, so an
+    incomplete result is shown for this run and fetched again on the next.
+    """
+
+    def __init__(self, value: Any):
+        super().__init__("Result not cached")
+        self.value = value
+
+def load_uncached(func, *args) -> Any:
+    """
+    Call a cached wrapper, returning the value of an UncachedResult it raises.
+    
+    Args:
+        func: Cached wrapper function
+        *args: Arguments for the wrapper
+        
+    Returns:
+        The wrapper's result, cached or not
+    """
+    try:
+        return func(*args)
+    except UncachedResult as e:
+        return e.value
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_playlists(_client: spotipy.Spotify, user_id: str) -> List[PlaylistInfo]:
+    """Cached wrapper around fetch_user_playlists, keyed on the user ID."""
+    return fetch_user_playlists(_client)
+
+@st.cache_data(ttl=SNAPSHOT_CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_tracks(_client: spotipy.Spotify, playlist_id: str, snapshot_id: Optional[str], track_count: int) -> List[TrackMetadata]:
+    """
+    Cached wrapper around fetch_playlist_tracks_with_metadata.
+    
+    Keyed on the playlist's snapshot ID, which Spotify changes on every edit,
+    so cached tracks are reused until the playlist actually changes. The
+    fetch returns [] on error, so an empty result for a non-empty playlist
+    is returned uncached.
+    """
+    tracks = fetch_playlist_tracks_with_metadata(_client, playlist_id)
+    if not tracks and track_count:
+        raise UncachedResult(tracks)
+    return tracks
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_features(_client: spotipy.Spotify, track_uris: Tuple[str, ...]) -> Dict[str, dict]:
+    """
+    Cached wrapper around fetch_audio_features, keyed on the tuple of track URIs.
+    
+    Durable per-track storage is the metadata cache in cache.py; this only
+    saves rebuilding the map on reruns. fetch_audio_features skips batches
+    that fail, so a map missing tracks is returned uncached.
+    """
+    features = fetch_audio_features(_client, track_uris)
+    if len(features) < len(set(track_uris)):
+        raise UncachedResult(features)
+    return features
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_recommendations(_client: spotipy.Spotify, playlist_id: str) -> List[TrackMetadata]:
+    """
+    Cached wrapper around get_playlist_recommendations, keyed on the playlist ID.
+    
+    Empty results (also what the fetch returns on error) are returned uncached.
+    """
+    recommendations = get_playlist_recommendations(_client, playlist_id)
+    if not recommendations:
+        raise UncachedResult(recommendations)
+    return recommendations
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_audio_analysis(_client: spotipy.Spotify, track_id: str) -> Optional[dict]:
+    """Cached wrapper around get_audio_analysis, keyed on the track ID."""
+    return get_audio_analysis(_client, track_id)
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_artist_details(_client: spotipy.Spotify, artist_id: str) -> Optional[dict]:
+    """Cached wrapper around get_artist_details, keyed on the artist ID."""
+    return get_artist_details(_client, artist_id)
+
+@functools.lru_cache(maxsize=4096)
 def format_duration(ms: int) -> str:
     """
     Format milliseconds into a human-readable duration string.
@@ -60,132 +220,364 @@ def format_duration(ms: int) -> str:
     Returns:
         str: Formatted duration string (e.g., "3:45")
     """
-    seconds = int(ms / 1000)
-    minutes = seconds // 60
-    seconds = seconds % 60
+    # Integer arithmetic only; common durations are served from the LRU cache
+    minutes, seconds = divmod(int(ms) // 1000, 60)
     return f"{minutes}:{seconds:02d}"
 
-def create_audio_features_plot(df: pd.DataFrame, feature: str, title: str) -> go.Figure:
-    """Create a histogram with a vertical line for the mean."""
-    fig = px.histogram(
-        df, 
-        x=feature,
-        title=title,
-        nbins=30,
-        color_discrete_sequence=['#1DB954']  # Spotify green
-    )
+def format_durations(ms: np.ndarray) -> np.ndarray:
+    """
+    Format an array of millisecond durations into "m:ss" strings.
     
-    # Add mean line
-    mean_value = df[feature].mean()
-    fig.add_vline(
-        x=mean_value,
-        line_dash="dash",
-        line_color="red",
-        annotation_text=f"Mean: {mean_value:.2f}",
-        annotation_position="top right"
-    )
+    Vectorized counterpart of format_duration for whole columns.
+    
+    Args:
+        ms: Durations in milliseconds
+        
+    Returns:
+        np.ndarray: Formatted duration strings (e.g., "3:45")
+    """
+    import numpy as np
+    
+    seconds = np.asarray(ms, dtype=np.int64) // 1000
+    minutes = (seconds // 60).astype(str)
+    return np.char.add(np.char.add(minutes, ':'), np.char.zfill((seconds % 60).astype(str), 2))
+
+def bin_values(values: np.ndarray, bins: int = HISTOGRAM_BINS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bin values into a histogram, ignoring NaNs.
+    
+    Args:
+        values: Numeric values to bin
+        bins: Number of equal-width bins
+        
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Bin centers and counts
+    """
+    import numpy as np
+    
+    values = values[~np.isnan(values)]
+    counts, edges = np.histogram(values, bins=bins)
+    return (edges[:-1] + edges[1:]) / 2, counts
+
+def compute_feature_histograms(df: pd.DataFrame) -> Dict[str, Tuple[np.ndarray, np.ndarray, float]]:
+    """
+    Pre-bin every plotted audio feature in one pass over the DataFrame.
+    
+    Args:
+        df: Track DataFrame containing audio feature columns
+        
+    Returns:
+        Dict[str, Tuple[np.ndarray, np.ndarray, float]]: Feature name to (bin centers, counts, mean)
+    """
+    import numpy as np
+    
+    histograms = {}
+    for feature, _ in AUDIO_FEATURE_PLOTS:
+        if feature in df:
+            values = df[feature].to_numpy(dtype=np.float64, na_value=np.nan)
+            centers, counts = bin_values(values)
+            histograms[feature] = (centers, counts, df[feature].mean())
+    return histograms
+
+def create_audio_features_grid(df: pd.DataFrame) -> "go.Figure":
+    """
+    Create a single figure with one histogram per audio feature.
+    
+    Rendering one subplot figure sends one payload to the browser instead
+    of a separate chart per feature.
+    
+    Args:
+        df: Track DataFrame containing audio feature columns
+        
+    Returns:
+        go.Figure: Two-column grid of histograms with mean lines
+    """
+    import pandas as pd
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
+    histograms = compute_feature_histograms(df)
+    plotted = [(feature, title) for feature, title in AUDIO_FEATURE_PLOTS if feature in histograms]
+    rows = max(1, (len(plotted) + 1) // 2)
+    fig = make_subplots(rows=rows, cols=2, subplot_titles=[title for _, title in plotted])
+    
+    for i, (feature, _) in enumerate(plotted):
+        row, col = i // 2 + 1, i % 2 + 1
+        centers, counts, mean_value = histograms[feature]
+        fig.add_trace(
+            go.Bar(x=centers, y=counts, marker_color='#1DB954'),
+            row=row,
+            col=col
+        )
+        if pd.notna(mean_value):
+            fig.add_vline(x=mean_value, line_dash="dash", line_color="red", row=row, col=col)
     
     fig.update_layout(
         showlegend=False,
-        xaxis_title=feature.capitalize(),
-        yaxis_title="Count",
+        bargap=0,
+        hovermode='x',
+        height=250 * rows,
         template="plotly_white"
     )
     
     return fig
 
-def display_track_table(tracks: List[TrackMetadata], features: Dict[str, dict]) -> None:
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def audio_features_grid_spec(_df: pd.DataFrame, data_key: str) -> dict:
     """
-    Display a table of tracks with their metadata and audio features.
+    Build the audio feature grid once per data_key and cache its plain dict spec.
+    
+    Binning, subplot layout and per-subplot mean lines are the slow part of
+    figure construction; reruns hand the cached spec straight to
+    st.plotly_chart. The cache is keyed on data_key alone so the DataFrame
+    is never hashed.
     
+    Args:
+        _df: Track DataFrame containing audio feature columns (not hashed)
+        data_key: Identifies the data in _df, e.g. playlist ID and snapshot ID
+        
+    Returns:
+        dict: Plotly figure spec (data and layout)
+    """
+    return create_audio_features_grid(_df).to_dict()
+
+def _track_cache_key(track: TrackMetadata) -> tuple:
+    """Hash key for TrackMetadata in st.cache_data (the dataclass itself is unhashable)."""
+    return (track.uri, track.added_at, tuple(track.genres))
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False, hash_funcs={TrackMetadata: _track_cache_key})
+def build_track_df(tracks: List[TrackMetadata], features: Dict[str, dict]) -> pd.DataFrame:
+    """
+    Build the track table DataFrame from track metadata and audio features.
+
+    Cached so widget interactions don't rebuild the table on every rerun.
+
     Args:
         tracks: List of track metadata objects
         features: Dictionary mapping track URIs to their audio features
+
+    Returns:
+        pd.DataFrame: One row per track
+    """
+    import numpy as np
+    import pandas as pd
+    
+    # Build each column in one pass instead of a dict per row; typed arrays
+    # skip pandas' per-row dtype inference
+    n = len(tracks)
+    # int32 holds any single track length (up to ~24 days in ms)
+    duration_ms = np.fromiter((t.duration_ms for t in tracks), dtype=np.int32, count=n)
+    # Text columns are Arrow-backed: no per-string PyObject, and Streamlit
+    # ships them to the browser as Arrow without conversion
+    df = pd.DataFrame({
+        'Name': pd.array([t.name for t in tracks], dtype=STRING_DTYPE),
+        'Artist': pd.Categorical([t.artist for t in tracks]),
+        'Album': pd.array([t.album for t in tracks], dtype=STRING_DTYPE),
+        'Duration': pd.array(format_durations(duration_ms), dtype=STRING_DTYPE),
+        'Duration (ms)': duration_ms,
+        'Popularity': np.fromiter((t.popularity for t in tracks), dtype=np.int16, count=n),
+        # Empty genre lists become None so the vectorized join yields NaN -> 'N/A'
+        'Genres': (
+            pd.Series([t.genres or None for t in tracks], dtype=object)
+            .str.join(', ')
+            .fillna('N/A')
+            .astype(STRING_DTYPE)
+        )
+    })
+
+    # Add audio features if available (missing tracks get NaN / <NA>);
+    # all fit in float32 / small nullable ints
+    if features:
+        # Fill one contiguous float32 matrix aligned with the track order in a
+        # single pass, then slice it into columns
+        columns = FLOAT_FEATURE_COLUMNS + INT_FEATURE_COLUMNS
+        matrix = np.full((n, len(columns)), np.nan, dtype=np.float32)
+        for i, track in enumerate(tracks):
+            row = features.get(track.uri)
+            if row:
+                matrix[i] = [row.get(col, np.nan) for col in columns]
+        for j, col in enumerate(columns):
+            if col in INT_FEATURE_COLUMNS:
+                df[col] = pd.array(matrix[:, j], dtype='Int8')
+            else:
+                df[col] = matrix[:, j]
+
+    return df
+
+def display_stats(df: pd.DataFrame, data_key: str) -> None:
+    """
+    Display summary statistics and audio feature distributions.
+
+    Args:
+        df: Track DataFrame built by build_track_df
+        data_key: Identifies the data in df (playlist ID and snapshot ID);
+            keys the cached distribution charts
+    """
+    # All dashboard statistics come from one fused agg call over the track
+    # columns, cheap enough to redo on each rerun
+    feature_averages = [(col, label) for col, label in AVERAGE_METRICS if col in df]
+    reductions = {'Duration (ms)': 'sum', 'Popularity': 'mean'}
+    reductions.update({col: 'mean' for col, _ in feature_averages})
+    stats = df.agg(reductions)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Tracks", len(df))
+    with col2:
+        st.metric("Total Duration", format_duration(int(stats['Duration (ms)'])))
+    with col3:
+        st.metric("Average Popularity", f"{stats['Popularity']:.1f}")
+    
+    if feature_averages:
+        for column, (feature, label) in zip(st.columns(len(feature_averages)), feature_averages):
+            with column:
+                value = stats[feature]
+                st.metric(label, f"{value:.1f}" if feature == 'tempo' else f"{value:.2f}")
+    
+    # Audio feature columns are only present when features were fetched.
+    # st.expander still runs its body when collapsed, so a checkbox gates the
+    # binning and plotting until the user asks for the charts.
+    if any(feature in df for feature, _ in AUDIO_FEATURE_PLOTS):
+        st.subheader("Audio Features")
+        if st.checkbox("Show audio feature distributions", value=False, key="show_distributions"):
+            st.plotly_chart(audio_features_grid_spec(df, data_key), use_container_width=True)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def sort_and_filter_tracks(_df: pd.DataFrame, data_key: str, search: str, sort_by: Optional[str], descending: bool) -> pd.DataFrame:
+    """
+    Apply the track table's search and sort to the whole DataFrame.
+    
+    Cached on data_key plus the widget state, so the DataFrame itself is
+    never hashed and paging through the result doesn't redo the work.
+    
+    Args:
+        _df: Track DataFrame built by build_track_df (not hashed)
+        data_key: Identifies the data in _df, e.g. playlist ID and snapshot ID
+        search: Case-insensitive text matched against SEARCH_COLUMNS
+        sort_by: Table column to sort by, or None for playlist order
+        descending: Sort in descending order
+        
+    Returns:
+        pd.DataFrame: Matching rows in display order
+    """
+    import pandas as pd
+    
+    df = _df
+    if search:
+        mask = pd.Series(False, index=df.index)
+        for col in SEARCH_COLUMNS:
+            if col in df:
+                mask |= df[col].str.contains(search, case=False, regex=False).fillna(False).astype(bool)
+        df = df[mask]
+    if sort_by:
+        df = df.sort_values(
+            SORT_COLUMN_OVERRIDES.get(sort_by, sort_by),
+            ascending=not descending,
+            kind='stable',
+            na_position='last'
+        )
+    return df
+
+def display_track_table(df: pd.DataFrame, data_key: str) -> None:
+    """
+    Display a table of tracks with their metadata and audio features.
+
+    Args:
+        df: Track DataFrame built by build_track_df
+        data_key: Identifies the data in df (playlist ID and snapshot ID);
+            also scopes the table widgets to the selected playlist
     """
-    if not tracks:
+    if df.empty:
         st.warning("No tracks to display.")
         return
-        
-    # Create DataFrame with track info and audio features
-    data = []
-    for track_meta in tracks:
-        track_data = {
-            'Name': track_meta.name,
-            'Artist': track_meta.artist,
-            'Album': track_meta.album,
-            'Duration': format_duration(track_meta.duration_ms),
-            'Popularity': track_meta.popularity,
-            'Genres': ', '.join(track_meta.genres) if track_meta.genres else 'N/A'
-        }
-        
-        # Add audio features if available
-        if track_meta.uri in features:
-            track_data.update(features[track_meta.uri])
-        
-        data.append(track_data)
+
+    columns = [col for col in TABLE_COLUMNS if col in df]
+    
+    # Search and sort run over every track before paging; the grid's own
+    # header sorting and search only see the rows of the current page
+    search_col, sort_col, order_col = st.columns([2, 2, 1])
+    with search_col:
+        search = st.text_input("Search tracks", key=f"track_search_{data_key}")
+    with sort_col:
+        sort_by = st.selectbox("Sort by", ["Playlist order"] + columns, key=f"track_sort_{data_key}")
+    with order_col:
+        descending = st.checkbox("Descending", value=False, key=f"track_desc_{data_key}")
+    df = sort_and_filter_tracks(
+        df, data_key, search.strip(), None if sort_by == "Playlist order" else sort_by, descending
+    )
+    
+    # Only one page of rows is serialized to the browser per rerun
+    total = len(df)
+    page_count = -(-total // TABLE_PAGE_SIZE)
+    if page_count > 1:
+        page = st.number_input(
+            "Page", min_value=1, max_value=page_count, value=1, step=1, key=f"track_page_{data_key}"
+        )
+        start = (int(page) - 1) * TABLE_PAGE_SIZE
+        df = df.iloc[start:start + TABLE_PAGE_SIZE]
+        st.caption(f"Tracks {start + 1}-{start + len(df)} of {total}")
     
-    # Create DataFrame and display
-    df = pd.DataFrame(data)
-    st.dataframe(df, use_container_width=True)
+    # Native column types render in the browser's virtualized grid
+    st.dataframe(
+        df[columns],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Popularity': st.column_config.ProgressColumn(
+                'Popularity', min_value=0, max_value=100, format='%d'
+            )
+        }
+    )
 
 def main():
     """Main function to run the Streamlit app."""
     st.title("Spotify Playlist Enhancer")
     
     try:
-        # Initialize Spotify client
-        client = init_spotify_client()
-        
+        # Initialize Spotify client (shared across reruns)
+        client = get_spotify_client()
+        if 'user_id' not in st.session_state:
+            st.session_state.user_id = client.current_user()['id']
+
         # Fetch user's playlists
-        playlists = fetch_user_playlists(client)
+        playlists = _cached_playlists(client, st.session_state.user_id)
         
         if not playlists:
             st.warning("No playlists found!")
             return
             
         # Display playlist selection
-        playlist_names = [f"{p.name} ({p.track_count} tracks)" for p in playlists]
+        name_to_playlist = {f"{p.name} ({p.track_count} tracks)": p for p in playlists}
         selected_playlist_name = st.selectbox(
             "Select a playlist to enhance",
-            playlist_names
+            list(name_to_playlist)
         )
         
         # Get the selected playlist object
-        selected_playlist = playlists[playlist_names.index(selected_playlist_name)]
+        selected_playlist = name_to_playlist[selected_playlist_name]
         
         st.write(f"Analyzing playlist: {selected_playlist.name}")
         
         # Fetch tracks and their metadata
-        tracks = fetch_playlist_tracks_with_metadata(client, selected_playlist.id)
+        with st.spinner(f"Fetching {selected_playlist.track_count} tracks..."):
+            tracks = load_uncached(
+                _cached_tracks, client, selected_playlist.id, selected_playlist.snapshot_id, selected_playlist.track_count
+            )
         
         if not tracks:
             st.warning("No tracks found in the selected playlist!")
             return
             
-        # Calculate basic statistics
-        total_tracks = len(tracks)
-        total_duration = sum(track.duration_ms for track in tracks)
-        avg_popularity = sum(track.popularity for track in tracks) / total_tracks
-        
-        # Display statistics
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Total Tracks", total_tracks)
-        with col2:
-            st.metric("Total Duration", format_duration(total_duration))
-        with col3:
-            st.metric("Average Popularity", f"{avg_popularity:.1f}")
-            
         # Fetch audio features
         track_uris = [track.uri for track in tracks if track.uri]
-        audio_features = fetch_audio_features(client, track_uris)
+        with st.spinner("Fetching audio features..."):
+            audio_features = load_uncached(_cached_features, client, tuple(track_uris))
         
-        # Create and display audio features plot
-        if audio_features:
-            create_audio_features_plot(audio_features)
-            
-        # Display track table
-        display_track_table(tracks, audio_features)
+        # One columnar table feeds the statistics, plots and track table
+        df = build_track_df(tracks, audio_features)
+        data_key = f"{selected_playlist.id}:{selected_playlist.snapshot_id}"
+        display_stats(df, data_key)
+        display_track_table(df, data_key)
         
         # After displaying the playlist dropdown, add buttons for shuffle and export
         if selected_playlist:
@@ -203,6 +595,8 @@ def main():
                     try:
                         with st.spinner("Shuffling playlist..."):
                             shuffle_playlist(client, selected_playlist.id)
+                            # Refetch playlists so the new snapshot ID invalidates cached tracks
+                            _cached_playlists.clear()
                             st.success("Playlist shuffled successfully!")
                     except Exception as e:
                         st.error(f"Error shuffling playlist: {e}")
@@ -211,8 +605,16 @@ def main():
                 if st.button("Export Analysis"):
                     try:
                         with st.spinner("Exporting analysis..."):
-                            export_analysis(tracks, audio_features)
-                            st.success("Analysis exported successfully!")
+                            # orjson bytes go straight to the browser; no str
+                            # round-trip and no file left on the server
+                            export_bytes = dumps_json(build_analysis_export(tracks, audio_features))
+                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                        st.download_button(
+                            "Download JSON",
+                            data=export_bytes,
+                            file_name=f"playlist_analysis_{timestamp}.json",
+                            mime="application/json"
+                        )
                     except Exception as e:
                         st.error(f"Error exporting analysis: {e}")
             
@@ -226,13 +628,15 @@ def main():
                 if st.button("Get Recommendations"):
                     try:
                         with st.spinner("Getting recommendations..."):
-                            recommendations = get_playlist_recommendations(client, selected_playlist.id)
+                            recommendations = load_uncached(_cached_recommendations, client, selected_playlist.id)
                             if recommendations:
                                 st.success(f"Found {len(recommendations)} recommended tracks!")
-                                st.write("Recommended Tracks:")
+                                # One markdown block instead of one st.write per track
+                                lines = ["**Recommended Tracks:**"]
                                 for track in recommendations:
                                     genre_text = f" ({', '.join(track.genres)})" if track.genres else ""
-                                    st.write(f"- {track.name} by {track.artist}{genre_text}")
+                                    lines.append(f"- {track.name} by {track.artist}{genre_text}")
+                                st.markdown("\n".join(lines))
                             else:
                                 st.warning("No recommendations found. Try selecting a different playlist.")
                     except Exception as e:
@@ -249,7 +653,7 @@ def main():
                         if selected_track:
                             try:
                                 with st.spinner("Analyzing track..."):
-                                    analysis = get_audio_analysis(client, selected_track.id)
+                                    analysis = _cached_audio_analysis(client, selected_track.id)
                                     if analysis:
                                         st.write("Audio Analysis:")
                                         st.json(analysis)
@@ -272,20 +676,19 @@ def main():
                         if selected_track and selected_track.artist_id:
                             try:
                                 with st.spinner("Fetching artist details..."):
-                                    details = get_artist_details(client, selected_track.artist_id)
+                                    details = _cached_artist_details(client, selected_track.artist_id)
                                     if details:
-                                        st.write("Artist Information:")
-                                        st.write(f"Name: {details['info']['name']}")
-                                        st.write(f"Popularity: {details['info']['popularity']}")
-                                        st.write(f"Genres: {', '.join(details['info']['genres'])}")
-                                        
-                                        st.write("\nTop Tracks:")
-                                        for track in details['top_tracks'][:5]:
-                                            st.write(f"- {track['name']}")
-                                        
-                                        st.write("\nRelated Artists:")
-                                        for artist in details['related_artists'][:5]:
-                                            st.write(f"- {artist['name']}")
+                                        info = details['info']
+                                        top_tracks = "\n".join(f"- {track['name']}" for track in details['top_tracks'][:5])
+                                        related = "\n".join(f"- {artist['name']}" for artist in details['related_artists'][:5])
+                                        st.markdown(
+                                            f"**Artist Information**\n\n"
+                                            f"- Name: {info['name']}\n"
+                                            f"- Popularity: {info['popularity']}\n"
+                                            f"- Genres: {', '.join(info['genres'])}\n\n"
+                                            f"**Top Tracks**\n\n{top_tracks}\n\n"
+                                            f"**Related Artists**\n\n{related}"
+                                        )
                                     else:
                                         st.warning("No artist details available.")
                             except Exception as e:
@@ -0,0 +1,134 @@
+"""
+Persistent metadata cache for Spotify Playlist Enhancer.
+Stores per-ID Spotify API results (audio features, artist genres) in SQLite
+so repeat analyses don't re-fetch data that never changes.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'spotify_enhancer')
+CACHE_FILENAME = 'metadata.sqlite3'
+DEFAULT_MAX_AGE = 30 * 86400  # 30 days; artist genres drift, audio features don't
+TABLES = ('audio_features', 'artist_genres')
+QUERY_CHUNK_SIZE = 500  # IDs per SELECT ... IN (...) statement
+
+class MetadataCache:
+    """SQLite-backed JSON cache keyed by Spotify ID, one table per resource."""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # One connection shared by worker threads, serialized by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        try:
+            # WAL lets the Streamlit and CLI processes read while one writes;
+            # NORMAL sync is safe under WAL and avoids an fsync per commit
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error as e:
+            logger.warning(f"Could not enable WAL mode for cache: {e}")
+        with self._conn:
+            for table in TABLES:
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    "id TEXT PRIMARY KEY, json TEXT NOT NULL, fetched_at INTEGER NOT NULL)"
+                )
+
+    def get_many(self, table: str, ids: Iterable[str], max_age: Optional[int] = DEFAULT_MAX_AGE) -> Dict[str, Any]:
+        """
+        Look up cached values for a set of IDs.
+
+        Args:
+            table: Cache table name (one of TABLES)
+            ids: Spotify IDs to look up
+            max_age: Ignore entries older than this many seconds (None for no limit)
+
+        Returns:
+            Dict[str, Any]: Cached values for the IDs that were found
+        """
+        ids = list(ids)
+        if not ids:
+            return {}
+
+        # One IN query per chunk keeps each statement under SQLite's
+        # bound-parameter limit (999 on older builds)
+        age_clause = ""
+        age_params = []
+        if max_age is not None:
+            age_clause = " AND fetched_at >= ?"
+            age_params.append(int(time.time()) - max_age)
+
+        rows = []
+        try:
+            with self._lock:
+                for i in range(0, len(ids), QUERY_CHUNK_SIZE):
+                    chunk = ids[i:i + QUERY_CHUNK_SIZE]
+                    query = f"SELECT id, json FROM {table} WHERE id IN ({','.join('?' * len(chunk))}){age_clause}"
+                    rows.extend(self._conn.execute(query, chunk + age_params).fetchall())
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read {table} from cache: {e}")
+            return {}
+        return {row_id: json.loads(value) for row_id, value in rows}
+
+    def put_many(self, table: str, items: Dict[str, Any]) -> None:
+        """
+        Store values for a set of IDs, replacing existing entries.
+
+        Args:
+            table: Cache table name (one of TABLES)
+            items: Map of Spotify ID to JSON-serializable value
+        """
+        if not items:
+            return
+
+        now = int(time.time())
+        rows = [(item_id, json.dumps(value), now) for item_id, value in items.items()]
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} (id, json, fetched_at) VALUES (?, ?, ?)",
+                    rows
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write {table} to cache: {e}")
+
+_caches: Dict[str, MetadataCache] = {}
+_caches_lock = threading.Lock()
+
+def get_cache() -> Optional[MetadataCache]:
+    """
+    Return the shared cache for the configured cache directory.
+
+    The directory defaults to ~/.cache/spotify_enhancer and can be
+    overridden with the SPOTIFY_CACHE_DIR environment variable.
+
+    Returns:
+        Optional[MetadataCache]: The cache, or None if it can't be opened
+    """
+    cache_dir = os.path.expanduser(os.getenv('SPOTIFY_CACHE_DIR', DEFAULT_CACHE_DIR))
+    path = os.path.join(cache_dir, CACHE_FILENAME)
+
+    with _caches_lock:
+        if path not in _caches:
+            try:
+                _caches[path] = MetadataCache(path)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Metadata cache disabled, could not open {path}: {e}")
+                return None
+        return _caches[path]
@@ -3,20 +3,22 @@ Command-line interface for Spotify Playlist Enhancer.
 """
 
 import logging
-import json
-from typing import List, Optional, Dict
+from typing import Dict, List, Optional
 import click
 from datetime import datetime
 from core import (
     init_spotify_client,
     fetch_user_playlists,
     fetch_liked_tracks,
-    get_playlist_track_uris,
     fetch_audio_features,
     fetch_playlist_tracks_with_metadata,
+    shuffle_playlist,
+    export_analysis,
+    call_with_backoff,
     PlaylistInfo,
     TrackMetadata
 )
+from export import dumps_json
 import traceback
 
 # Configure logging
@@ -28,20 +30,21 @@ logger = logging.getLogger(__name__)
 
 def display_playlists(playlists: List[PlaylistInfo]) -> None:
     """Display available playlists in a formatted table."""
-    click.echo("\nAvailable Playlists:")
-    click.echo("-" * 60)
-    click.echo(f"{'#':<4} {'Name':<40} {'Tracks':<8}")
-    click.echo("-" * 60)
-    
-    for i, playlist in enumerate(playlists, 1):
-        click.echo(f"{i:<4} {playlist.name:<40} {playlist.track_count:<8}")
-    click.echo("-" * 60)
+    separator = "-" * 60
+    lines = ["\nAvailable Playlists:", separator, f"{'#':<4} {'Name':<40} {'Tracks':<8}", separator]
+    lines.extend(
+        f"{i:<4} {playlist.name:<40} {playlist.track_count:<8}"
+        for i, playlist in enumerate(playlists, 1)
+    )
+    lines.append(separator)
+    # One write instead of a flushed echo per playlist
+    click.echo("\n".join(lines))
 
 def export_to_json(data: Dict, filename: str) -> None:
     """Export data to a JSON file."""
     try:
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(dumps_json(data))
         click.echo(f"\nData exported to {filename}")
     except Exception as e:
         click.echo(f"Error exporting to JSON: {e}", err=True)
@@ -67,16 +70,12 @@ def add_tracks_to_playlist(client, playlist_id: str, track_uris: List[str]) -> N
     for i in range(0, len(track_uris), batch_size):
         batch = track_uris[i:i + batch_size]
         try:
-            client.playlist_add_items(playlist_id, batch)
+            call_with_backoff(client.playlist_add_items, playlist_id, batch)
             click.echo(f"Added batch of {len(batch)} tracks")
         except Exception as e:
             click.echo(f"Error adding tracks: {e}", err=True)
             raise
 
-def export_analysis(tracks, features):
-    """Dummy export_analysis for testing purposes."""
-    pass
-
 @click.group()
 def cli():
     """Spotify Playlist Enhancer - CLI Interface"""
@@ -105,7 +104,8 @@ def analyze(export: bool, playlist: int):
         audio_features = fetch_audio_features(client, track_uris)
         click.echo(f"Successfully analyzed {len(audio_features)} tracks")
         if export:
-            export_analysis(tracks, audio_features)
+            filename = export_analysis(tracks, audio_features)
+            click.echo(f"\nData exported to {filename}")
         click.echo("Displaying track analysis...")
         for track, features in zip(tracks, audio_features):
             click.echo(f"Track: {track.name} by {track.artist}")
@@ -174,18 +174,7 @@ def shuffle(playlist: int):
         selected_playlist = playlists[playlist - 1]
         click.echo(f"\nShuffling playlist: {selected_playlist.name}")
         
-        # Get tracks
-        track_uris = get_playlist_track_uris(client, selected_playlist.id)
-        
-        # Shuffle tracks
-        import random
-        random.shuffle(track_uris)
-        
-        # Clear playlist
-        client.playlist_replace_items(selected_playlist.id, [])
-        
-        # Add shuffled tracks
-        add_tracks_to_playlist(client, selected_playlist.id, track_uris)
+        shuffle_playlist(client, selected_playlist.id)
         
         click.echo("\nPlaylist shuffled successfully!")
         
@@ -5,22 +5,32 @@ Handles authentication, Spotify API interactions, and analysis.
 
 import os
 import logging
-from typing import Dict, List, Optional, Tuple, Union, Any
+import functools
+import itertools
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union, Any
 from dataclasses import dataclass, field
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import traceback
+import time
+import threading
 from datetime import datetime
 import random
-import json
+from concurrent.futures import ThreadPoolExecutor
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from cache import get_cache
+from export import dumps_json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; responses fall back to requests' json()
+    orjson = None
+
+# Logging is configured by the entry points (app.py, cli.py)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
@@ -28,8 +38,53 @@ load_dotenv()
 
 # Constants
 REDIRECT_URI = os.getenv('SPOTIPY_REDIRECT_URI', 'http://127.0.0.1:8888/callback')
+MAX_WORKERS = 8  # Concurrent Spotify requests; keeps us under the rate limit
+RATE_LIMIT_RETRIES = 5  # Retries of a request Spotify rate limited (429), see call_with_backoff
+# Statuses the HTTP session retries itself; 429 is handled by call_with_backoff
+SESSION_RETRY_CODES = tuple(code for code in spotipy.Spotify.default_retry_codes if code != 429)
+WRITE_WORKERS = 4  # Concurrent playlist writes; Spotify tolerates a few parallel appends
+
+# Shared 429 cooldown deadline (time.monotonic()), see call_with_backoff
+_RATE_LIMIT = {"until": 0.0}
+_RATE_LIMIT_LOCK = threading.Lock()
+
+# OAuth scopes requested from Spotify, built once at import
+SPOTIFY_SCOPES = (
+    'playlist-read-private',
+    'playlist-read-collaborative',
+    'playlist-modify-private',
+    'playlist-modify-public',
+    'user-library-read',
+    'user-library-modify',
+    'user-read-private',
+    'user-read-email',
+    'user-top-read',
+    'user-read-recently-played',
+    'user-read-currently-playing',
+    'user-read-playback-state',
+    'user-modify-playback-state',
+    'user-read-playback-position',
+    'streaming',
+    'app-remote-control',
+    'user-follow-read',
+    'user-follow-modify'
+)
+SPOTIFY_SCOPE = ' '.join(SPOTIFY_SCOPES)
+
+# Playlist item fields used to build TrackMetadata; 'total' enables concurrent paging
+PLAYLIST_TRACK_FIELDS = (
+    'items(added_at,track(id,uri,name,duration_ms,popularity,album(name),artists(id,name))),total'
+)
 
-@dataclass
+# Numeric audio-feature fields kept from the API response; URLs, IDs and
+# type markers are dropped before anything is cached or analyzed
+AUDIO_FEATURE_KEYS = frozenset({
+    'danceability', 'energy', 'key', 'loudness', 'mode', 'speechiness',
+    'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo',
+    'time_signature'
+})
+
+@dataclass(slots=True)
 class PlaylistInfo:
     """Container for playlist metadata."""
     id: str
@@ -42,8 +97,9 @@ class PlaylistInfo:
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     image_url: Optional[str] = None
+    snapshot_id: Optional[str] = None  # Changes whenever the playlist's tracks change
 
-@dataclass
+@dataclass(slots=True)
 class TrackMetadata:
     """Container for track metadata including when it was added."""
     id: str
@@ -54,13 +110,11 @@ class TrackMetadata:
     duration_ms: int
     popularity: int
     added_at: str
-    genres: List[str]
     uri: str
+    genres: List[str] = field(default_factory=list)
 
 def verify_env_variables() -> None:
-    """Verify and log environment variables."""
-    load_dotenv()
-    
+    """Verify and log environment variables (.env is loaded once at import)."""
     client_id = os.getenv('SPOTIFY_CLIENT_ID')
     client_secret = os.getenv('SPOTIFY_CLIENT_SECRET')
     
@@ -72,61 +126,192 @@ def verify_env_variables() -> None:
     if not client_id or not client_secret:
         raise ValueError("Missing required environment variables. Please check your .env file.")
 
+def _orjson_response_hook(response: requests.Response, *args, **kwargs) -> None:
+    """
+    Make response.json() decode with orjson.
+    
+    spotipy parses every API response via response.json(); large pages of
+    tracks decode several times faster with orjson. Decode errors are
+    ValueErrors, as with the stdlib parser, so spotipy's handling is unchanged.
+    """
+    response.json = lambda **_: orjson.loads(response.content)
+
+def build_http_session() -> requests.Session:
+    """
+    Build a keep-alive HTTP session shared by all Spotify requests.
+    
+    The connection pool is sized to MAX_WORKERS so concurrent batch and page
+    requests reuse open TLS connections instead of discarding extras. Passing
+    a custom session disables spotipy's own retry adapter, so the same retry
+    policy is mounted here, minus 429: rate limits are left to
+    call_with_backoff, which needs the response's Retry-After header.
+    
+    Returns:
+        requests.Session: Session with a pooled, retrying HTTPS adapter
+    """
+    retry = Retry(
+        total=spotipy.Spotify.max_retries,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+        status=spotipy.Spotify.max_retries,
+        backoff_factor=0.3,
+        status_forcelist=SESSION_RETRY_CODES,
+        # urllib3 otherwise retries any 429 that carries Retry-After
+        respect_retry_after_header=False
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=MAX_WORKERS, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if orjson is not None:
+        session.hooks['response'].append(_orjson_response_hook)
+    return session
+
+@functools.lru_cache(maxsize=1)
+def _create_spotify_client() -> spotipy.Spotify:
+    """
+    Build the authorized Spotify client once per process.
+    
+    Errors propagate (and are therefore not cached), so a failed attempt is
+    retried on the next call.
+    """
+    verify_env_variables()
+    
+    client_id = os.getenv('SPOTIFY_CLIENT_ID')
+    client_secret = os.getenv('SPOTIFY_CLIENT_SECRET')
+    redirect_uri = os.getenv('REDIRECT_URI', 'http://127.0.0.1:8888/callback')
+    
+    logger.info("Initializing Spotify client with:")
+    logger.info(f"Client ID: {client_id[:8]}...")
+    logger.info(f"Redirect URI: {redirect_uri}")
+    
+    logger.info(f"Scopes: {SPOTIFY_SCOPE}")
+    
+    session = build_http_session()
+    auth_manager = SpotifyOAuth(
+        client_id=client_id,
+        client_secret=client_secret,
+        redirect_uri=redirect_uri,
+        scope=SPOTIFY_SCOPE,
+        open_browser=True,
+        requests_session=session
+    )
+    
+    client = spotipy.Spotify(auth_manager=auth_manager, requests_session=session)
+    logger.info("Successfully initialized Spotify client")
+    return client
+
 def init_spotify_client() -> Optional[spotipy.Spotify]:
-    """Initialize Spotify client with environment variables."""
+    """
+    Initialize Spotify client with environment variables.
+    
+    The client is created once and reused for the rest of the process, so
+    repeated calls skip the OAuth setup.
+    
+    Returns:
+        Optional[spotipy.Spotify]: The shared client, or None if initialization failed
+    """
     try:
-        verify_env_variables()
-        
-        client_id = os.getenv('SPOTIFY_CLIENT_ID')
-        client_secret = os.getenv('SPOTIFY_CLIENT_SECRET')
-        redirect_uri = os.getenv('REDIRECT_URI', 'http://127.0.0.1:8888/callback')
-        
-        logger.info("Initializing Spotify client with:")
-        logger.info(f"Client ID: {client_id[:8]}...")
-        logger.info(f"Redirect URI: {redirect_uri}")
+        return _create_spotify_client()
+    except Exception as e:
+        logger.error(f"Error initializing Spotify client: {e}")
+        return None
+
+def call_with_backoff(func, *args, **kwargs):
+    """
+    Call a Spotify API method, retrying when it is rate limited (HTTP 429).
+    
+    Waits for the Retry-After period Spotify sends (or an exponential delay
+    when the header is missing) and retries the same request, so a throttled
+    batch is re-sent instead of being dropped. The cooldown is shared: every
+    thread waits it out before its next request.
+    
+    Args:
+        func: Spotify client method to call
+        *args: Positional arguments for the method
+        **kwargs: Keyword arguments for the method
         
-        scopes = [
-            'playlist-read-private',
-            'playlist-modify-private',
-            'user-library-read',
-            'user-library-modify',
-            'user-read-private',
-            'user-read-email',
-            'user-top-read',
-            'user-read-recently-played',
-            'user-read-currently-playing',
-            'user-read-playback-state',
-            'user-modify-playback-state',
-            'streaming',
-            'app-remote-control',
-            'user-read-playback-position',
-            'playlist-read-collaborative',
-            'playlist-modify-public',
-            'playlist-modify-private',
-            'user-follow-read',
-            'user-follow-modify',
-            'user-read-email'  # Required for audio features and analysis
-        ]
+    Returns:
+        The method's result
         
-        logger.info(f"Scopes: {', '.join(scopes)}")
+    Raises:
+        spotipy.SpotifyException: For non-429 errors, or once retries are exhausted
+    """
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        # Honour a cooldown started by any thread, so concurrent workers
+        # don't keep hitting the API while it is rate limiting us
+        with _RATE_LIMIT_LOCK:
+            remaining = _RATE_LIMIT["until"] - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        try:
+            return func(*args, **kwargs)
+        except spotipy.SpotifyException as e:
+            # spotipy also reports exhausted session retries (e.g. repeated
+            # 5xx) as a 429, but without response headers; only a real 429
+            # response starts a cooldown or is retried here
+            if e.http_status != 429 or not e.headers:
+                raise
+            try:
+                delay = float(e.headers.get('Retry-After'))
+            except (TypeError, ValueError):
+                delay = 2 ** attempt
+            # Start the shared cooldown from this response even when giving
+            # up, so other workers still back off
+            with _RATE_LIMIT_LOCK:
+                _RATE_LIMIT["until"] = max(_RATE_LIMIT["until"], time.monotonic() + delay)
+            if attempt == RATE_LIMIT_RETRIES:
+                raise
+            logger.warning(f"Rate limited by Spotify, retrying in {delay:g}s (attempt {attempt + 1}/{RATE_LIMIT_RETRIES})")
+
+def iter_api_items(client, api_method, **kwargs) -> Iterator[dict]:
+    """
+    Yield items from a paginated Spotify API call, page by page.
+    
+    The first page reports the total item count, so the remaining pages
+    are requested concurrently and yielded in offset order as they arrive.
+    Responses without a total fall back to following each page's 'next' URL.
+    
+    Args:
+        client: Spotify client instance
+        api_method: The API method to call (e.g., client.current_user_playlists)
+        **kwargs: Additional arguments to pass to the API method
         
-        auth_manager = SpotifyOAuth(
-            client_id=client_id,
-            client_secret=client_secret,
-            redirect_uri=redirect_uri,
-            scope=scopes,
-            open_browser=True
-        )
+    Yields:
+        dict: Items from each page, in playlist/library order
+    """
+    limit = kwargs.pop('limit', 50)
+    
+    def fetch_page(offset):
+        return call_with_backoff(api_method, limit=limit, offset=offset, **kwargs)
+    
+    try:
+        response = fetch_page(0)
+        yield from response.get('items', [])
+        total = response.get('total')
         
-        client = spotipy.Spotify(auth_manager=auth_manager)
-        logger.info("Successfully initialized Spotify client")
-        return client
+        if isinstance(total, int):
+            offsets = range(limit, total, limit)
+            if offsets:
+                with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                    # map() yields pages in offset order
+                    for page in executor.map(fetch_page, offsets):
+                        yield from page.get('items', [])
+            return
         
+        # Follow Spotify's own cursor; a null 'next' marks the last page
+        while response.get('next'):
+            response = call_with_backoff(client.next, response)
+            if not response:
+                break
+            yield from response.get('items', [])
     except Exception as e:
-        logger.error(f"Error initializing Spotify client: {e}")
-        return None
+        logger.error(f"Error in pagination: {e}")
+        logger.error(traceback.format_exc())
+        raise
 
-def paginate_api_call(client, api_method, **kwargs):
+def paginate_api_call(client, api_method, **kwargs) -> list:
     """
     Helper function to handle pagination for Spotify API calls.
     
@@ -138,26 +323,7 @@ def paginate_api_call(client, api_method, **kwargs):
     Returns:
         list: Combined results from all pages
     """
-    results = []
-    offset = 0
-    limit = kwargs.pop('limit', 50)
-    
-    while True:
-        try:
-            response = api_method(limit=limit, offset=offset, **kwargs)
-            items = response.get('items', [])
-            results.extend(items)
-            
-            if len(items) < limit:
-                break
-                
-            offset += limit
-        except Exception as e:
-            logger.error(f"Error in pagination: {e}")
-            logger.error(traceback.format_exc())
-            raise
-            
-    return results
+    return list(iter_api_items(client, api_method, **kwargs))
 
 def fetch_user_playlists(sp: spotipy.Spotify) -> List[PlaylistInfo]:
     """
@@ -204,10 +370,11 @@ def fetch_user_playlists(sp: spotipy.Spotify) -> List[PlaylistInfo]:
                     is_collaborative=p['collaborative'],
                     created_at=created_at,
                     updated_at=updated_at,
-                    image_url=p['images'][0]['url'] if p['images'] else None
+                    image_url=p['images'][0]['url'] if p['images'] else None,
+                    snapshot_id=p.get('snapshot_id')
                 )
                 playlist_info.append(playlist)
-                logger.debug(f"Found playlist: {playlist.name} (ID: {playlist.id}, Tracks: {playlist.track_count})")
+                logger.debug("Found playlist: %s (ID: %s, Tracks: %d)", playlist.name, playlist.id, playlist.track_count)
             except Exception as e:
                 logger.error(f"Error processing playlist {p.get('id', 'unknown')}: {e}")
                 continue
@@ -223,43 +390,44 @@ def fetch_user_playlists(sp: spotipy.Spotify) -> List[PlaylistInfo]:
 def fetch_playlist_tracks_with_metadata(client: spotipy.Spotify, playlist_id: str) -> List[TrackMetadata]:
     """Fetch tracks from a playlist with metadata."""
     try:
-        tracks = []
-        results = client.playlist_tracks(playlist_id)
+        # Pages after the first are fetched concurrently by paginate_api_call;
+        # the fields projection drops images, markets and other unused data
+        items = paginate_api_call(
+            client,
+            client.playlist_tracks,
+            playlist_id=playlist_id,
+            fields=PLAYLIST_TRACK_FIELDS,
+            limit=100
+        )
+        items = [item for item in items if item['track']]
         
-        while results:
-            for item in results['items']:
-                if item['track']:
-                    track = item['track']
-                    artist = track['artists'][0]['name'] if track['artists'] else "Unknown Artist"
-                    artist_id = track['artists'][0]['id'] if track['artists'] else None
-                    
-                    # Get artist genres if we have an artist ID
-                    genres = []
-                    if artist_id:
-                        try:
-                            artist_info = client.artist(artist_id)
-                            genres = artist_info.get('genres', [])
-                        except Exception as e:
-                            logger.warning(f"Could not fetch genres for artist {artist_id}: {e}")
-                    
-                    track_metadata = TrackMetadata(
-                        id=track['id'],
-                        name=track['name'],
-                        artist=artist,
-                        artist_id=artist_id,
-                        album=track['album']['name'],
-                        duration_ms=track['duration_ms'],
-                        popularity=track['popularity'],
-                        added_at=item['added_at'],
-                        genres=genres,
-                        uri=track['uri']
-                    )
-                    tracks.append(track_metadata)
+        # Look up genres for every distinct first artist in one batched pass
+        artist_ids = {
+            item['track']['artists'][0]['id']
+            for item in items
+            if item['track']['artists'] and item['track']['artists'][0].get('id')
+        }
+        artist_genres = fetch_artist_genres(client, artist_ids)
+        
+        tracks = []
+        for item in items:
+            track = item['track']
+            artist = track['artists'][0]['name'] if track['artists'] else "Unknown Artist"
+            artist_id = track['artists'][0].get('id') if track['artists'] else None
             
-            if results['next']:
-                results = client.next(results)
-            else:
-                results = None
+            track_metadata = TrackMetadata(
+                id=track['id'],
+                name=track['name'],
+                artist=artist,
+                artist_id=artist_id,
+                album=track['album']['name'],
+                duration_ms=track['duration_ms'],
+                popularity=track['popularity'],
+                added_at=item['added_at'],
+                genres=artist_genres.get(artist_id, []),
+                uri=track['uri']
+            )
+            tracks.append(track_metadata)
         
         return tracks
     except Exception as e:
@@ -302,7 +470,7 @@ def fetch_liked_tracks(sp: spotipy.Spotify) -> List[TrackMetadata]:
                     genres=[]  # Will be populated later
                 )
                 track_metadata.append(metadata)
-                logger.debug(f"Found liked track: {metadata.name} by {metadata.artist}")
+                logger.debug("Found liked track: %s by %s", metadata.name, metadata.artist)
             except Exception as e:
                 logger.error(f"Error processing liked track {item.get('track', {}).get('id', 'unknown')}: {e}")
                 continue
@@ -315,6 +483,33 @@ def fetch_liked_tracks(sp: spotipy.Spotify) -> List[TrackMetadata]:
         logger.error(traceback.format_exc())
         raise
 
+def iter_playlist_track_uris(client: spotipy.Spotify, playlist_id: str) -> Iterator[str]:
+    """
+    Yield the track URIs of a playlist as each page arrives.
+    
+    Args:
+        client: Authenticated Spotify client
+        playlist_id: Spotify playlist ID
+        
+    Yields:
+        str: Track URIs in playlist order
+        
+    Raises:
+        Exception: If any page fails
+    """
+    # Requesting 'total' alongside the URIs lets the remaining pages be
+    # fetched concurrently
+    items = iter_api_items(
+        client,
+        client.playlist_items,
+        playlist_id=playlist_id,
+        fields='items(track(uri)),total',
+        limit=100
+    )
+    for item in items:
+        if item['track']:  # Skip None tracks
+            yield item['track']['uri']
+
 def get_playlist_track_uris(client: spotipy.Spotify, playlist_id: str) -> List[str]:
     """
     Fetch all track URIs from a specific playlist.
@@ -325,34 +520,12 @@ def get_playlist_track_uris(client: spotipy.Spotify, playlist_id: str) -> List[s
         
     Returns:
         List[str]: List of track URIs
+        
+    Raises:
+        Exception: If any page fails; callers rewrite the playlist from this
+            list, so a partial result is never returned
     """
-    tracks = []
-    offset = 0
-    limit = 100
-    
-    while True:
-        try:
-            results = client.playlist_items(
-                playlist_id,
-                limit=limit,
-                offset=offset,
-                fields='items.track.uri'
-            )
-            
-            if not results['items']:
-                break
-                
-            for item in results['items']:
-                if item['track']:  # Skip None tracks
-                    tracks.append(item['track']['uri'])
-            
-            offset += limit
-            if len(results['items']) < limit:
-                break
-                
-        except Exception as e:
-            logger.error(f"Error fetching playlist tracks: {e}")
-            break
+    tracks = list(iter_playlist_track_uris(client, playlist_id))
     
     logger.info(f"Fetched {len(tracks)} tracks from playlist {playlist_id}")
     return tracks
@@ -360,58 +533,42 @@ def get_playlist_track_uris(client: spotipy.Spotify, playlist_id: str) -> List[s
 def get_spotify_token(client) -> str:
     """Return the current access token from a Spotipy client."""
     try:
-        token = client._auth_manager.get_access_token(as_dict=False)
-        logger.info(f"Fetched access token from Spotipy client: {token[:10]}...")
-        return token
+        return client._auth_manager.get_access_token(as_dict=False)
     except Exception as e:
         logger.error(f"Failed to get access token from Spotipy client: {e}")
         return None
 
-def fetch_audio_features(client: spotipy.Spotify, track_uris: List[str]) -> Dict[str, dict]:
-    """
-    Fetch audio features for a list of track URIs.
+def fetch_audio_features(client: spotipy.Spotify, track_uris: Iterable[str]) -> Dict[str, dict]:
     """
-    # Filter out None values
-    track_uris = [uri for uri in track_uris if uri]
-    
-    logger.info(f"Input track_uris type: {type(track_uris)}")
-    logger.info(f"Input track_uris length: {len(track_uris)}")
-    logger.info(f"First few track_uris: {track_uris[:3]}")
-    
-    if not track_uris:
-        logger.warning("No track URIs provided")
-        return {}
-        
-    if not isinstance(track_uris, list):
-        track_uris = list(track_uris)
-        logger.info(f"Converted track_uris to list. New type: {type(track_uris)}")
-        
-    track_ids = [uri.split(':')[-1] for uri in track_uris]
-    logger.info(f"Track IDs type: {type(track_ids)}")
-    logger.info(f"Track IDs length: {len(track_ids)}")
-    logger.info(f"First few track IDs: {track_ids[:3]}")
+    Fetch audio features for track URIs.
     
+    track_uris may be any iterable, e.g. iter_playlist_track_uris(). It is
+    consumed 100 URIs at a time and uncached IDs are sent off in full
+    batches as soon as they accumulate, so requests start before the input
+    is exhausted.
+    """
     batch_size = 100
+    # Audio features never change for a track ID, so cached entries never expire
+    cache = get_cache()
     features_map = {}
     
-    for i in range(0, len(track_ids), batch_size):
-        batch = track_ids[i:i + batch_size]
-        logger.info(f"Processing batch {i//batch_size + 1}")
-        logger.info(f"Batch type: {type(batch)}")
-        logger.info(f"Batch length: {len(batch)}")
-        logger.info(f"First few batch items: {batch[:3]}")
+    def fetch_batch(batch_number: int, batch: List[str]) -> Dict[str, dict]:
+        batch_features = {}
+        logger.debug("Processing batch %d (%d tracks), first few: %r", batch_number, len(batch), batch[:3])
         
         try:
-            results = client.audio_features(batch)
+            results = call_with_backoff(client.audio_features, batch)
             if results:
                 # Map features to track URIs
                 for track_id, features in zip(batch, results):
                     if features:  # Skip None features
                         track_uri = f"spotify:track:{track_id}"
-                        features_map[track_uri] = features
-                logger.info(f"Successfully fetched features for batch {i//batch_size + 1}")
+                        batch_features[track_uri] = {
+                            k: v for k, v in features.items() if k in AUDIO_FEATURE_KEYS
+                        }
+                logger.debug("Successfully fetched features for batch %d", batch_number)
             else:
-                logger.warning(f"No features returned for batch {i//batch_size + 1}")
+                logger.warning(f"No features returned for batch {batch_number}")
         except Exception as e:
             logger.error(f"Error fetching audio features for batch: {str(e)}")
             logger.error(f"Error type: {type(e)}")
@@ -426,8 +583,46 @@ def fetch_audio_features(client: spotipy.Spotify, track_uris: List[str]) -> Dict
                     logger.error(f"Error response from Spotify API: {e.response.json()}")
                 except:
                     logger.error("Could not parse error response as JSON")
-            
-            continue
+        
+        return batch_features
+    
+    uris = (uri for uri in track_uris if uri)  # Filter out None values
+    total = 0
+    seen = set()
+    pending = []
+    futures = []
+    # Batches are independent network calls, so run them concurrently
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        while chunk := list(itertools.islice(uris, batch_size)):
+            total += len(chunk)
+            # Request each track once even if the input repeats it
+            track_ids = [
+                track_id for track_id in dict.fromkeys(uri.rpartition(':')[2] for uri in chunk)
+                if track_id not in seen
+            ]
+            seen.update(track_ids)
+            cached = cache.get_many('audio_features', track_ids, max_age=None) if cache else {}
+            features_map.update((f"spotify:track:{track_id}", features) for track_id, features in cached.items())
+            pending.extend(track_id for track_id in track_ids if track_id not in cached)
+            # Only send full batches until the input runs out
+            while len(pending) >= batch_size:
+                futures.append(executor.submit(fetch_batch, len(futures) + 1, pending[:batch_size]))
+                pending = pending[batch_size:]
+        if pending:
+            futures.append(executor.submit(fetch_batch, len(futures) + 1, pending))
+        
+        if not total:
+            logger.warning("No track URIs provided")
+            return {}
+        logger.info(f"Audio features cache hits: {len(features_map)}, batches to fetch: {len(futures)}")
+        
+        fetched = {}
+        for future in futures:
+            fetched.update(future.result())
+    
+    if cache:
+        cache.put_many('audio_features', {uri.rpartition(':')[2]: features for uri, features in fetched.items()})
+    features_map.update(fetched)
             
     return features_map
 
@@ -438,22 +633,47 @@ def fetch_artist_genres(client: spotipy.Spotify, artist_ids: List[str]) -> Dict[
         return genres
     if isinstance(artist_ids, set):
         artist_ids = list(artist_ids)
+    
+    cache = get_cache()
+    if cache:
+        genres.update(cache.get_many('artist_genres', artist_ids))
+        artist_ids = [artist_id for artist_id in artist_ids if artist_id not in genres]
+    
     batch_size = 50
-    for i in range(0, len(artist_ids), batch_size):
-        batch = artist_ids[i:i + batch_size]
+    batches = [artist_ids[i:i + batch_size] for i in range(0, len(artist_ids), batch_size)]
+    
+    def fetch_batch(batch: List[str]) -> Dict[str, List[str]]:
         try:
-            response = client.artists(batch)
-            for artist in response.get('artists', []):
-                genres[artist['id']] = artist.get('genres', [])
+            response = call_with_backoff(client.artists, batch)
+            # Unknown IDs come back as null entries
+            return {
+                artist['id']: artist.get('genres', [])
+                for artist in response.get('artists', [])
+                if artist
+            }
         except Exception as e:
             logger.error(f"Error fetching genres for artist batch: {e}")
             logger.error(traceback.format_exc())
-            continue
+            return {}
+    
+    fetched = {}
+    if batches:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for batch_genres in executor.map(fetch_batch, batches):
+                fetched.update(batch_genres)
+    
+    if cache:
+        cache.put_many('artist_genres', fetched)
+    genres.update(fetched)
     return genres
 
 def shuffle_playlist(client: spotipy.Spotify, playlist_id: str) -> None:
     """
     Shuffle the tracks in a playlist using the Spotify API.
+    
+    The first 100 shuffled tracks replace the playlist contents in one call;
+    the rest are appended in batches of 100 concurrently, since their relative
+    order is random anyway.
     """
     try:
         # Get the current tracks in the playlist
@@ -462,54 +682,77 @@ def shuffle_playlist(client: spotipy.Spotify, playlist_id: str) -> None:
             logger.warning("No tracks found in playlist.")
             return
 
-        # Shuffle the track URIs
-        random.shuffle(tracks)
+        # Shuffle the track URIs into a new list
+        tracks = random.sample(tracks, len(tracks))
 
-        # Batch the tracks into chunks of 100
         batch_size = 100
-        for i in range(0, len(tracks), batch_size):
-            batch = tracks[i:i + batch_size]
-            client.playlist_replace_items(playlist_id, batch)
-            logger.info(f"Updated batch {i//batch_size + 1} of playlist {playlist_id}.")
+        call_with_backoff(client.playlist_replace_items, playlist_id, tracks[:batch_size])
+        batches = [tracks[i:i + batch_size] for i in range(batch_size, len(tracks), batch_size)]
+        if batches:
+            with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as executor:
+                list(executor.map(
+                    lambda batch: call_with_backoff(client.playlist_add_items, playlist_id, batch),
+                    batches
+                ))
 
         logger.info(f"Playlist {playlist_id} shuffled successfully.")
     except Exception as e:
         logger.error(f"Error shuffling playlist: {e}")
         raise
 
-def export_analysis(tracks: List[TrackMetadata], features: Dict[str, dict]) -> None:
+def build_analysis_export(tracks: List[TrackMetadata], features: Dict[str, dict]) -> dict:
+    """
+    Build the playlist analysis export payload.
+    
+    Args:
+        tracks: List of track metadata objects
+        features: Dictionary mapping track URIs to their audio features
+        
+    Returns:
+        dict: JSON-serializable track and audio feature data
+    """
+    return {
+        "tracks": [
+            {
+                "id": track.id,
+                "name": track.name,
+                "artist": track.artist,
+                "album": track.album,
+                "duration_ms": track.duration_ms,
+                "popularity": track.popularity,
+                "added_at": track.added_at,
+                "genres": track.genres,
+                "uri": track.uri
+            }
+            for track in tracks
+        ],
+        "audio_features": features
+    }
+
+def export_analysis(tracks: List[TrackMetadata], features: Dict[str, dict]) -> str:
     """
-    Export playlist analysis data to a JSON file.
+    Export playlist analysis data to a timestamped JSON file.
+    
+    Args:
+        tracks: List of track metadata objects
+        features: Dictionary mapping track URIs to their audio features
+        
+    Returns:
+        str: Path of the written file
     """
     try:
-        # Create a dictionary with track and feature data
-        data = {
-            "tracks": [
-                {
-                    "id": track.id,
-                    "name": track.name,
-                    "artist": track.artist,
-                    "album": track.album,
-                    "duration_ms": track.duration_ms,
-                    "popularity": track.popularity,
-                    "added_at": track.added_at,
-                    "genres": track.genres,
-                    "uri": track.uri
-                }
-                for track in tracks
-            ],
-            "audio_features": features
-        }
+        data = build_analysis_export(tracks, features)
 
         # Generate a filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"playlist_analysis_{timestamp}.json"
 
         # Write the data to a JSON file
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=4)
+        with open(filename, "wb") as f:
+            f.write(dumps_json(data))
 
         logger.info(f"Analysis exported to {filename}")
+        return filename
     except Exception as e:
         logger.error(f"Error exporting analysis: {e}")
         raise
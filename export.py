@@ -4,16 +4,46 @@ JSON serialization utilities for Spotify Playlist Enhancer.
 
 import json
 import logging
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+# Logging is configured by the entry points (app.py, cli.py)
 logger = logging.getLogger(__name__)
 
+def _json_default(obj: Any) -> Any:
+    """Serialize types the JSON encoders don't handle natively."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if hasattr(obj, 'tolist'):  # NumPy scalars and arrays
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps_json(data: Any) -> bytes:
+    """
+    Serialize data to indented UTF-8 JSON bytes.
+    
+    Uses orjson when installed (several times faster on large track lists)
+    and falls back to the stdlib json module otherwise.
+    
+    Args:
+        data: JSON-serializable data (datetimes and NumPy values allowed)
+        
+    Returns:
+        bytes: UTF-8 encoded JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            data,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+            default=_json_default
+        )
+    return json.dumps(data, indent=2, default=_json_default).encode('utf-8')
+
 def export_analysis(
     features: Dict[str, dict],
     tempo_buckets: Optional[Dict[str, List[str]]] = None,
@@ -49,8 +79,8 @@ def export_analysis(
         data["energy_buckets"] = energy_buckets
     
     try:
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        with open(filepath, 'wb') as f:
+            f.write(dumps_json(data))
         logger.info(f"Analysis exported to {filepath}")
         return filepath
     except Exception as e:
@@ -7,7 +7,7 @@ from unittest.mock import MagicMock
 import os
 from datetime import datetime
 from typing import Dict, List
-from core import PlaylistInfo, TrackMetadata
+from core import PlaylistInfo, TrackMetadata, _create_spotify_client
 
 @pytest.fixture
 def mock_spotify_client():
@@ -27,7 +27,8 @@ def mock_spotify_client():
                 'collaborative': False,
                 'created_at': '2024-01-01T00:00:00Z',
                 'updated_at': '2024-01-02T00:00:00Z',
-                'images': [{'url': 'https://example.com/image1.jpg'}]
+                'images': [{'url': 'https://example.com/image1.jpg'}],
+                'snapshot_id': 'snapshot1'
             },
             {
                 'id': 'playlist2',
@@ -133,4 +134,16 @@ def mock_env_vars(monkeypatch):
     """Set up mock environment variables for testing."""
     monkeypatch.setenv('SPOTIFY_CLIENT_ID', 'test_client_id')
     monkeypatch.setenv('SPOTIFY_CLIENT_SECRET', 'test_client_secret')
-    monkeypatch.setenv('SPOTIPY_REDIRECT_URI', 'http://localhost:8888/callback') 
\ No newline at end of file
+    monkeypatch.setenv('SPOTIPY_REDIRECT_URI', 'http://localhost:8888/callback')
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(monkeypatch, tmp_path):
+    """Point the persistent metadata cache at a per-test directory."""
+    monkeypatch.setenv('SPOTIFY_CACHE_DIR', str(tmp_path / 'cache'))
+
+@pytest.fixture(autouse=True)
+def fresh_spotify_client():
+    """Drop the process-wide Spotify client so each test builds its own."""
+    _create_spotify_client.cache_clear()
+    yield
+    _create_spotify_client.cache_clear()
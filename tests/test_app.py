@@ -4,12 +4,21 @@ Tests for app functionality of Spotify Playlist Enhancer.
 
 import pytest
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 from unittest.mock import patch, MagicMock
 from app import (
     format_duration,
-    create_audio_features_plot,
-    display_track_table
+    format_durations,
+    create_audio_features_grid,
+    audio_features_grid_spec,
+    bin_values,
+    display_track_table,
+    display_stats,
+    build_track_df,
+    load_uncached,
+    _cached_features,
+    _cached_tracks
 )
 from core import TrackMetadata
 
@@ -20,36 +29,63 @@ def test_format_duration():
     assert format_duration(59999) == "0:59"
     assert format_duration(3600000) == "60:00"
 
-def test_create_audio_features_plot():
-    """Test audio features plot creation."""
-    # Create test data
+def test_format_durations():
+    """Test vectorized duration formatting matches the scalar version."""
+    ms = np.array([61000, 0, 59999, 3600000])
+    assert list(format_durations(ms)) == [format_duration(int(m)) for m in ms]
+    assert len(format_durations(np.array([], dtype=np.int64))) == 0
+
+def test_bin_values_ignores_nan():
+    """Test histogram binning skips missing values."""
+    centers, counts = bin_values(np.array([0.1, 0.2, np.nan, 0.9]), bins=4)
+    assert len(centers) == 4
+    assert counts.sum() == 3
+
+def test_create_audio_features_grid():
+    """Test that all features share one subplot figure."""
     df = pd.DataFrame({
-        'danceability': [0.5, 0.6, 0.7, 0.8, 0.9]
+        'tempo': [90.0, 120.0, 150.0],
+        'energy': [0.2, 0.5, 0.9],
+        'danceability': [0.3, 0.6, 0.7]
     })
     
-    # Create plot
-    fig = create_audio_features_plot(df, 'danceability', 'Test Plot')
+    fig = create_audio_features_grid(df)
     
-    # Verify plot properties
     assert isinstance(fig, go.Figure)
-    assert fig.layout.title.text == 'Test Plot'
-    assert fig.layout.xaxis.title.text == 'Danceability'
-    assert fig.layout.yaxis.title.text == 'Count'
-    
-    # Verify mean line
-    mean_line = [shape for shape in fig.layout.shapes if shape.line.dash == 'dash']
-    assert len(mean_line) == 1
-    assert mean_line[0].line.color == 'red'
-
-def test_create_audio_features_plot_empty_data():
-    """Test audio features plot creation with empty data."""
-    df = pd.DataFrame({'danceability': []})
-    fig = create_audio_features_plot(df, 'danceability', 'Empty Plot')
+    assert len(fig.data) == 3
+    mean_lines = [shape for shape in fig.layout.shapes if shape.line.dash == 'dash']
+    assert len(mean_lines) == 3
+
+def test_create_audio_features_grid_empty_data():
+    """Test grid creation with no feature values."""
+    fig = create_audio_features_grid(pd.DataFrame({'danceability': pd.Series([], dtype='float32')}))
     assert isinstance(fig, go.Figure)
 
+def test_audio_features_grid_spec():
+    """Test that the cached grid spec is a plain dict plotly can render."""
+    df = pd.DataFrame({'tempo': [90.0, 120.0, 150.0], 'energy': [0.2, 0.5, 0.9]})
+    
+    spec = audio_features_grid_spec(df, 'playlist1:snap1')
+    
+    assert isinstance(spec, dict)
+    assert len(go.Figure(spec).data) == 2
+
 def test_display_track_table_empty():
     """Test track table display with empty data."""
-    display_track_table([], {})
+    display_track_table(pd.DataFrame(), 'empty')
+
+def test_display_stats():
+    """Test statistics display from a track DataFrame with and without features."""
+    df = pd.DataFrame({
+        'Duration (ms)': np.array([180000, 60000], dtype=np.int32),
+        'Popularity': np.array([80, 40], dtype=np.int16)
+    })
+    display_stats(df, 'no-features')
+
+    df['tempo'] = np.array([120.0, 90.0], dtype=np.float32)
+    with patch('app.st.checkbox', return_value=True), patch('app.st.plotly_chart') as mock_chart:
+        display_stats(df, 'with-features')
+    assert len(mock_chart.call_args.args[0]['data']) == 1
 
 def test_display_track_table_with_data():
     """Test track table display with sample data."""
@@ -84,7 +120,7 @@ def test_display_track_table_with_data():
             'time_signature': 4
         }
     }
-    display_track_table(tracks, features)
+    display_track_table(build_track_df(tracks, features), 'with-features')
 
 def test_display_track_table_missing_features():
     """Test track table display with missing audio features."""
@@ -101,4 +137,121 @@ def test_display_track_table_missing_features():
             uri='spotify:track:test123'
         )
     ]
-    display_track_table(tracks, {}) 
\ No newline at end of file
+    display_track_table(build_track_df(tracks, {}), 'missing-features')
+
+def test_build_track_df():
+    """Test track DataFrame construction with and without audio features."""
+    tracks = [
+        TrackMetadata(
+            id='test123',
+            name='Test Track',
+            artist='Test Artist',
+            artist_id='artist123',
+            album='Test Album',
+            duration_ms=185000,
+            popularity=80,
+            added_at='2024-01-01T00:00:00Z',
+            genres=['rock', 'indie'],
+            uri='spotify:track:test123'
+        ),
+        TrackMetadata(
+            id='test456',
+            name='Other Track',
+            artist='Other Artist',
+            artist_id='artist456',
+            album='Other Album',
+            duration_ms=61000,
+            popularity=40,
+            added_at='2024-01-02T00:00:00Z',
+            genres=[],
+            uri='spotify:track:test456'
+        )
+    ]
+    features = {'spotify:track:test123': {'danceability': 0.8, 'tempo': 120.0, 'key': 5}}
+
+    df = build_track_df(tracks, features)
+
+    assert list(df['Name']) == ['Test Track', 'Other Track']
+    assert list(df['Duration']) == ['3:05', '1:01']
+    assert df['Duration (ms)'].sum() == 246000
+    assert list(df['Genres']) == ['rock, indie', 'N/A']
+    assert df.loc[0, 'tempo'] == 120.0
+    assert pd.isna(df.loc[1, 'tempo'])
+    assert df['tempo'].dtype == 'float32'
+    assert df['Popularity'].dtype == 'int16'
+    assert df['Duration (ms)'].dtype == 'int32'
+    assert df['key'].dtype == 'Int8'
+    assert df['Name'].dtype == 'string[pyarrow]'
+    assert df.loc[0, 'key'] == 5
+    assert pd.isna(df.loc[1, 'key'])
+
+def _paging_df(count: int) -> pd.DataFrame:
+    """Build a track DataFrame with numbered names and popularity."""
+    return pd.DataFrame({
+        'Name': pd.array([f'Track {i}' for i in range(count)], dtype='string[pyarrow]'),
+        'Artist': pd.array(['Artist'] * count, dtype='string[pyarrow]'),
+        'Album': pd.array(['Album'] * count, dtype='string[pyarrow]'),
+        'Popularity': np.arange(count, dtype=np.int16) % 100
+    })
+
+def test_display_track_table_pages():
+    """Test that only the selected page of rows reaches st.dataframe."""
+    df = _paging_df(450)
+    
+    with patch('app.st.number_input', return_value=2) as mock_page, \
+         patch('app.st.dataframe') as mock_dataframe:
+        display_track_table(df, 'playlist1:snap1')
+    
+    assert mock_page.call_args.kwargs['key'] == 'track_page_playlist1:snap1'
+    shown = mock_dataframe.call_args.args[0]
+    assert list(shown['Name']) == [f'Track {i}' for i in range(200, 400)]
+
+def test_display_track_table_sorts_before_paging():
+    """Test that sorting and search cover every track, not just one page."""
+    df = _paging_df(450)
+    
+    with patch('app.st.selectbox', return_value='Popularity'), \
+         patch('app.st.checkbox', return_value=True), \
+         patch('app.st.dataframe') as mock_dataframe:
+        display_track_table(df, 'playlist1:snap1')
+    assert list(mock_dataframe.call_args.args[0]['Name'][:4]) == ['Track 99', 'Track 199', 'Track 299', 'Track 399']
+    
+    with patch('app.st.text_input', return_value='track 42'), \
+         patch('app.st.dataframe') as mock_dataframe:
+        display_track_table(df, 'playlist1:snap1')
+    assert list(mock_dataframe.call_args.args[0]['Name']) == ['Track 42'] + [f'Track {i}' for i in range(420, 430)]
+
+def test_cached_features_skips_incomplete_results():
+    """Test that a feature map missing tracks is returned but not cached."""
+    track_uris = ('spotify:track:track1', 'spotify:track:track2')
+    partial = {'spotify:track:track1': {'tempo': 120.0}}
+    complete = {uri: {'tempo': 120.0} for uri in track_uris}
+    
+    with patch('app.fetch_audio_features', side_effect=[partial, complete, complete]) as mock_fetch:
+        assert load_uncached(_cached_features, MagicMock(), track_uris) == partial
+        assert load_uncached(_cached_features, MagicMock(), track_uris) == complete
+        assert load_uncached(_cached_features, MagicMock(), track_uris) == complete
+    
+    assert mock_fetch.call_count == 2
+
+def test_cached_tracks_skips_failed_fetch():
+    """Test that an empty fetch for a non-empty playlist is not cached."""
+    track = TrackMetadata(
+        id='test123',
+        name='Test Track',
+        artist='Test Artist',
+        artist_id='artist123',
+        album='Test Album',
+        duration_ms=180000,
+        popularity=80,
+        added_at=None,
+        genres=[],
+        uri='spotify:track:test123'
+    )
+    
+    with patch('app.fetch_playlist_tracks_with_metadata', side_effect=[[], [track], [track]]) as mock_fetch:
+        assert load_uncached(_cached_tracks, MagicMock(), 'playlist1', 'snap-empty', 1) == []
+        assert load_uncached(_cached_tracks, MagicMock(), 'playlist1', 'snap-empty', 1) == [track]
+        assert load_uncached(_cached_tracks, MagicMock(), 'playlist1', 'snap-empty', 1) == [track]
+    
+    assert mock_fetch.call_count == 2
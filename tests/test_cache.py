@@ -0,0 +1,76 @@
+"""
+Tests for the persistent metadata cache of Spotify Playlist Enhancer.
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+from cache import MetadataCache, get_cache
+from core import fetch_audio_features
+
+def test_put_and_get_many(tmp_path):
+    """Test storing and retrieving cached values."""
+    cache = MetadataCache(str(tmp_path / 'cache.sqlite3'))
+    cache.put_many('audio_features', {
+        'track1': {'tempo': 120.0},
+        'track2': {'tempo': 90.0}
+    })
+    
+    result = cache.get_many('audio_features', ['track1', 'track2', 'track3'])
+    
+    assert result == {'track1': {'tempo': 120.0}, 'track2': {'tempo': 90.0}}
+
+def test_cache_uses_wal_mode(tmp_path):
+    """Test that the cache database is opened in WAL mode."""
+    cache = MetadataCache(str(tmp_path / 'cache.sqlite3'))
+    assert cache._conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert cache._conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+def test_get_many_large_id_list(tmp_path):
+    """Test lookups larger than one query chunk (and SQLite's parameter limit)."""
+    cache = MetadataCache(str(tmp_path / 'cache.sqlite3'))
+    cache.put_many('audio_features', {f'track{i}': {'tempo': float(i)} for i in range(2500)})
+    
+    result = cache.get_many('audio_features', [f'track{i}' for i in range(3000)])
+    
+    assert len(result) == 2500
+    assert result['track2499'] == {'tempo': 2499.0}
+
+def test_get_many_skips_expired_entries(tmp_path):
+    """Test that entries older than max_age are treated as misses."""
+    cache = MetadataCache(str(tmp_path / 'cache.sqlite3'))
+    with patch('cache.time.time', return_value=time.time() - 3600):
+        cache.put_many('artist_genres', {'artist1': ['rock']})
+    
+    assert cache.get_many('artist_genres', ['artist1'], max_age=60) == {}
+    assert cache.get_many('artist_genres', ['artist1'], max_age=None) == {'artist1': ['rock']}
+
+def test_get_cache_uses_env_dir(tmp_path, monkeypatch):
+    """Test that SPOTIFY_CACHE_DIR selects the cache location."""
+    monkeypatch.setenv('SPOTIFY_CACHE_DIR', str(tmp_path / 'custom'))
+    cache = get_cache()
+    assert cache.path.startswith(str(tmp_path / 'custom'))
+    assert get_cache() is cache
+
+def test_fetch_audio_features_uses_cache():
+    """Test that a second fetch of the same tracks is served from the cache."""
+    client = MagicMock()
+    client.audio_features.side_effect = lambda ids: [{'id': track_id, 'tempo': 100.0} for track_id in ids]
+    track_uris = ['spotify:track:track1', 'spotify:track:track2']
+    
+    first = fetch_audio_features(client, track_uris)
+    second = fetch_audio_features(client, track_uris)
+    
+    assert first == second
+    assert client.audio_features.call_count == 1
+
+def test_cached_audio_features_never_expire():
+    """Test that old audio features are still served from the cache."""
+    with patch('cache.time.time', return_value=time.time() - 365 * 86400):
+        get_cache().put_many('audio_features', {'track1': {'tempo': 120.0}})
+    client = MagicMock()
+    
+    features = fetch_audio_features(client, ['spotify:track:track1'])
+    
+    assert features == {'spotify:track:track1': {'tempo': 120.0}}
+    client.audio_features.assert_not_called()
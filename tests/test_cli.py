@@ -4,8 +4,10 @@ Tests for CLI functionality of Spotify Playlist Enhancer.
 
 import pytest
 from click.testing import CliRunner
-from cli import cli, display_playlists
-from core import PlaylistInfo, TrackMetadata
+from unittest.mock import MagicMock
+import json
+from cli import cli, display_playlists, add_tracks_to_playlist, export_to_json, export_analysis
+from core import PlaylistInfo, TrackMetadata, build_analysis_export
 from datetime import datetime
 
 def test_display_playlists(capsys):
@@ -94,7 +96,8 @@ def test_cli_commands(monkeypatch, command, expected):
     ])
     monkeypatch.setattr("cli.create_playlist", lambda client, name, description: "new_playlist_id")
     monkeypatch.setattr("cli.add_tracks_to_playlist", lambda client, pid, uris: None)
-    monkeypatch.setattr("cli.get_playlist_track_uris", lambda client, pid: ['spotify:track:track1'])
+    shuffled = []
+    monkeypatch.setattr("cli.shuffle_playlist", lambda client, pid: shuffled.append(pid))
     monkeypatch.setattr("cli.export_analysis", lambda tracks, features: print("Data exported to"))
     
     # Ensure playlist argument is string for shuffle command (Click parses from string)
@@ -103,4 +106,50 @@ def test_cli_commands(monkeypatch, command, expected):
     
     result = runner.invoke(cli, command)
     assert result.exit_code == 0
-    assert expected in result.output 
\ No newline at end of file
+    assert expected in result.output
+    if command[0] == "shuffle":
+        assert shuffled == ["1"]
+
+def test_add_tracks_to_playlist_batches():
+    """Test that every track is uploaded in order, in batches of at most 100."""
+    client = MagicMock()
+    track_uris = [f'spotify:track:track{i}' for i in range(250)]
+    
+    add_tracks_to_playlist(client, 'playlist1', track_uris)
+    
+    batches = [call.args[1] for call in client.playlist_add_items.call_args_list]
+    assert len(batches) == 3
+    assert all(len(batch) <= 100 for batch in batches)
+    assert [uri for batch in batches for uri in batch] == track_uris
+
+def test_export_to_json(tmp_path):
+    """Test that a dict is exported as a JSON object."""
+    filename = tmp_path / 'export.json'
+    data = {'tracks': [{'uri': 'spotify:track:track1'}], 'audio_features': {}}
+    
+    export_to_json(data, str(filename))
+    
+    assert json.loads(filename.read_bytes()) == data
+
+def test_export_analysis_matches_core_schema(tmp_path, monkeypatch):
+    """Test that the CLI export has the same shape as core.build_analysis_export."""
+    monkeypatch.chdir(tmp_path)
+    tracks = [
+        TrackMetadata(
+            id="track1",
+            name="Test Track",
+            artist="Test Artist",
+            artist_id="artist1",
+            album="Test Album",
+            duration_ms=180000,
+            popularity=80,
+            added_at="2024-01-01T00:00:00Z",
+            genres=["rock"],
+            uri="spotify:track:track1"
+        )
+    ]
+    features = {"spotify:track:track1": {"tempo": 120.0}}
+    
+    filename = tmp_path / export_analysis(tracks, features)
+    
+    assert json.loads(filename.read_text()) == build_analysis_export(tracks, features)
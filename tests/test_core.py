@@ -5,7 +5,11 @@ Tests for core functionality of Spotify Playlist Enhancer.
 import pytest
 from unittest.mock import patch, MagicMock
 import os
+import requests
+from spotipy import SpotifyException
 from datetime import datetime
+import time
+from cache import get_cache
 from core import (
     verify_env_variables,
     init_spotify_client,
@@ -13,6 +17,17 @@ from core import (
     fetch_liked_tracks,
     fetch_playlist_tracks_with_metadata,
     fetch_audio_features,
+    fetch_artist_genres,
+    paginate_api_call,
+    call_with_backoff,
+    RATE_LIMIT_RETRIES,
+    _RATE_LIMIT,
+    get_playlist_track_uris,
+    iter_playlist_track_uris,
+    build_http_session,
+    build_analysis_export,
+    shuffle_playlist,
+    MAX_WORKERS,
     PlaylistInfo,
     TrackMetadata
 )
@@ -36,6 +51,128 @@ def test_init_spotify_client(mock_oauth, mock_env_vars):
     assert client is not None
     mock_oauth.assert_called_once()
 
+@patch('core.SpotifyOAuth')
+def test_init_spotify_client_reused(mock_oauth, mock_env_vars):
+    """Test that repeated initialization reuses the same client."""
+    assert init_spotify_client() is init_spotify_client()
+    mock_oauth.assert_called_once()
+
+def test_init_spotify_client_failure_not_cached(monkeypatch, mock_env_vars):
+    """Test that a failed initialization is retried on the next call."""
+    monkeypatch.delenv('SPOTIFY_CLIENT_ID')
+    assert init_spotify_client() is None
+    
+    monkeypatch.setenv('SPOTIFY_CLIENT_ID', 'test_client_id')
+    with patch('core.SpotifyOAuth'):
+        assert init_spotify_client() is not None
+
+def test_build_http_session():
+    """Test the shared session pools connections and keeps spotipy's retries."""
+    session = build_http_session()
+    adapter = session.get_adapter('https://api.spotify.com/v1/me')
+    assert adapter._pool_maxsize == MAX_WORKERS
+    assert 429 not in adapter.max_retries.status_forcelist
+    assert 503 in adapter.max_retries.status_forcelist
+    assert not adapter.max_retries.is_retry('GET', 429, has_retry_after=True)
+
+def test_build_http_session_parses_json_with_orjson():
+    """Test that responses from the shared session decode through the hook."""
+    session = build_http_session()
+    response = requests.Response()
+    response._content = b'{"items": [1, 2], "total": 2}'
+    
+    for hook in session.hooks['response']:
+        hook(response)
+    
+    assert response.json() == {'items': [1, 2], 'total': 2}
+
+@patch('core.time.sleep')
+@patch('core.time.monotonic', return_value=100.0)
+@patch.dict('core._RATE_LIMIT', {'until': 0.0})
+def test_call_with_backoff_retries_rate_limits(mock_monotonic, mock_sleep):
+    """Test that 429 responses are retried after the Retry-After delay."""
+    rate_limited = SpotifyException(429, -1, 'Too Many Requests', headers={'Retry-After': '3'})
+    api = MagicMock(side_effect=[rate_limited, rate_limited, {'ok': True}])
+    
+    assert call_with_backoff(api, 'arg', limit=5) == {'ok': True}
+    assert api.call_count == 3
+    api.assert_called_with('arg', limit=5)
+    mock_sleep.assert_called_with(3.0)
+
+@patch('core.time.sleep')
+@patch.dict('core._RATE_LIMIT', {'until': 0.0})
+def test_call_with_backoff_gives_up(mock_sleep):
+    """Test that other errors, and exhausted retries, are raised."""
+    api = MagicMock(side_effect=SpotifyException(404, -1, 'Not Found'))
+    with pytest.raises(SpotifyException):
+        call_with_backoff(api)
+    assert api.call_count == 1
+    
+    api = MagicMock(side_effect=SpotifyException(429, -1, 'Too Many Requests', headers={'Retry-After': '1'}))
+    with pytest.raises(SpotifyException):
+        call_with_backoff(api)
+    assert api.call_count == RATE_LIMIT_RETRIES + 1
+    
+    # Exhausted session retries surface as a header-less 429 and aren't retried
+    api = MagicMock(side_effect=SpotifyException(429, -1, 'Max Retries'))
+    with pytest.raises(SpotifyException):
+        call_with_backoff(api)
+    assert api.call_count == 1
+
+@patch('core.time.sleep')
+@patch.dict('core._RATE_LIMIT', {'until': 0.0})
+def test_call_with_backoff_shared_cooldown(mock_sleep):
+    """Test that a 429 on one call delays the next call made by any caller."""
+    rate_limited = SpotifyException(429, -1, 'Too Many Requests', headers={'Retry-After': '30'})
+    call_with_backoff(MagicMock(side_effect=[rate_limited, {'ok': True}]))
+    mock_sleep.reset_mock()
+    
+    later = time.monotonic() + 10
+    with patch('core.time.monotonic', return_value=later):
+        call_with_backoff(MagicMock(return_value={'ok': True}))
+    
+    assert mock_sleep.call_count == 1
+    assert 19 < mock_sleep.call_args.args[0] <= 20
+
+@patch('core.time.monotonic', return_value=100.0)
+@patch.dict('core._RATE_LIMIT', {'until': 0.0})
+def test_call_with_backoff_cooldown_only_from_real_429(mock_monotonic):
+    """Test the cooldown starts from a 429's Retry-After, not exhausted 5xx retries."""
+    with pytest.raises(SpotifyException):
+        call_with_backoff(MagicMock(side_effect=SpotifyException(429, -1, 'Max Retries')))
+    assert _RATE_LIMIT['until'] == 0.0
+    
+    rate_limited = SpotifyException(429, -1, 'Too Many Requests', headers={'Retry-After': '7'})
+    with patch('core.RATE_LIMIT_RETRIES', 0), pytest.raises(SpotifyException):
+        call_with_backoff(MagicMock(side_effect=rate_limited))
+    assert _RATE_LIMIT['until'] == 107.0
+
+def test_paginate_api_call_concurrent():
+    """Test that pages after the first are fetched and returned in order."""
+    def api_method(limit, offset):
+        return {'items': list(range(offset, min(offset + limit, 120))), 'total': 120}
+    api = MagicMock(side_effect=api_method)
+    
+    results = paginate_api_call(None, api, limit=50)
+    
+    assert results == list(range(120))
+    assert api.call_count == 3
+
+def test_paginate_api_call_follows_next():
+    """Test that responses without a total are paged via their 'next' URL."""
+    client = MagicMock()
+    client.current_user_playlists.return_value = {'items': [1, 2], 'next': 'page2'}
+    client.next.side_effect = [
+        {'items': [3, 4], 'next': 'page3'},
+        {'items': [5], 'next': None}
+    ]
+    
+    results = paginate_api_call(client, client.current_user_playlists, limit=2)
+    
+    assert results == [1, 2, 3, 4, 5]
+    assert client.next.call_count == 2
+    client.current_user_playlists.assert_called_once()
+
 def test_fetch_user_playlists(mock_spotify_client):
     """Test fetching user playlists."""
     playlists = fetch_user_playlists(mock_spotify_client)
@@ -48,6 +185,7 @@ def test_fetch_user_playlists(mock_spotify_client):
     assert playlists[0].owner == 'Test Owner'
     assert playlists[0].is_public is True
     assert playlists[0].is_collaborative is False
+    assert playlists[0].snapshot_id == 'snapshot1'
     assert isinstance(playlists[0].created_at, datetime)
     assert isinstance(playlists[0].updated_at, datetime)
 
@@ -79,6 +217,84 @@ def test_fetch_playlist_tracks_with_metadata(mock_spotify_client):
     assert isinstance(tracks[0].added_at, datetime)
     assert isinstance(tracks[0].genres, list)
 
+def test_fetch_playlist_tracks_genres_fetched_once_per_artist():
+    """Test that repeated artists only trigger one genre lookup."""
+    client = MagicMock()
+    items = []
+    for i in range(3):
+        items.append({
+            'track': {
+                'id': f'track{i}',
+                'name': f'Track {i}',
+                'artists': [{'name': 'Same Artist', 'id': 'artist1'}],
+                'album': {'name': 'Album'},
+                'duration_ms': 180000,
+                'popularity': 50,
+                'uri': f'spotify:track:track{i}'
+            },
+            'added_at': '2024-01-01T00:00:00Z'
+        })
+    client.playlist_tracks.return_value = {'items': items, 'next': None}
+    client.artists.return_value = {'artists': [{'id': 'artist1', 'genres': ['rock']}]}
+    
+    tracks = fetch_playlist_tracks_with_metadata(client, 'playlist1')
+    
+    assert len(tracks) == 3
+    assert all(track.genres == ['rock'] for track in tracks)
+    client.artists.assert_called_once_with(['artist1'])
+    client.artist.assert_not_called()
+
+def test_fetch_playlist_tracks_pages_in_order():
+    """Test that every page of a long playlist is fetched and kept in order."""
+    def playlist_tracks(playlist_id, fields, limit, offset):
+        items = [
+            {
+                'track': {
+                    'id': f'track{i}',
+                    'name': f'Track {i}',
+                    'artists': [],
+                    'album': {'name': 'Album'},
+                    'duration_ms': 180000,
+                    'popularity': 50,
+                    'uri': f'spotify:track:track{i}'
+                },
+                'added_at': '2024-01-01T00:00:00Z'
+            }
+            for i in range(offset, min(offset + limit, 250))
+        ]
+        return {'items': items, 'total': 250}
+    client = MagicMock()
+    client.playlist_tracks.side_effect = playlist_tracks
+    
+    tracks = fetch_playlist_tracks_with_metadata(client, 'playlist1')
+    
+    assert [track.id for track in tracks] == [f'track{i}' for i in range(250)]
+    assert client.playlist_tracks.call_count == 3
+
+def test_get_playlist_track_uris():
+    """Test that URIs from every page are returned in order, skipping empty tracks."""
+    def playlist_items(playlist_id, fields, limit, offset):
+        items = [
+            {'track': {'uri': f'spotify:track:track{i}'} if i % 50 else None}
+            for i in range(offset, min(offset + limit, 250))
+        ]
+        return {'items': items, 'total': 250}
+    client = MagicMock()
+    client.playlist_items.side_effect = playlist_items
+    
+    uris = get_playlist_track_uris(client, 'playlist1')
+    
+    assert uris == [f'spotify:track:track{i}' for i in range(250) if i % 50]
+    assert client.playlist_items.call_count == 3
+
+def test_get_playlist_track_uris_raises_on_error():
+    """Test that a failed page raises instead of returning a partial list."""
+    client = MagicMock()
+    client.playlist_items.side_effect = Exception("API error")
+    
+    with pytest.raises(Exception):
+        get_playlist_track_uris(client, 'playlist1')
+
 def test_fetch_audio_features(mock_spotify_client):
     """Test fetching audio features."""
     track_uris = ['spotify:track:track1', 'spotify:track:track2']
@@ -90,6 +306,67 @@ def test_fetch_audio_features(mock_spotify_client):
     assert feature['energy'] == 0.7
     assert feature['tempo'] == 120.0
 
+def test_fetch_audio_features_multiple_batches():
+    """Test that every 100-track batch is fetched and merged."""
+    client = MagicMock()
+    client.audio_features.side_effect = lambda ids: [
+        {'id': track_id, 'tempo': float(track_id[5:])} for track_id in ids
+    ]
+    track_uris = [f'spotify:track:track{i}' for i in range(250)]
+    
+    features = fetch_audio_features(client, track_uris)
+    
+    assert len(features) == 250
+    assert features['spotify:track:track249'] == {'tempo': 249.0}
+    assert client.audio_features.call_count == 3
+
+def test_fetch_audio_features_from_generator():
+    """Test that URIs can be streamed in and uncached IDs go out in full batches."""
+    get_cache().put_many('audio_features', {f'track{i}': {'tempo': 90.0} for i in range(0, 250, 5)})
+    client = MagicMock()
+    client.audio_features.side_effect = lambda ids: [{'id': track_id, 'tempo': 100.0} for track_id in ids]
+    
+    features = fetch_audio_features(client, (f'spotify:track:track{i}' for i in range(250)))
+    
+    assert len(features) == 250
+    assert sorted(len(call.args[0]) for call in client.audio_features.call_args_list) == [100, 100]
+
+def test_fetch_audio_features_deduplicates():
+    """Test that repeated URIs are only requested once."""
+    client = MagicMock()
+    client.audio_features.side_effect = lambda ids: [{'id': track_id, 'tempo': 100.0} for track_id in ids]
+    track_uris = [f'spotify:track:track{i % 3}' for i in range(150)]
+    
+    features = fetch_audio_features(client, track_uris)
+    
+    assert len(features) == 3
+    client.audio_features.assert_called_once()
+    assert sorted(client.audio_features.call_args.args[0]) == ['track0', 'track1', 'track2']
+
+def test_iter_playlist_track_uris():
+    """Test that playlist URIs are yielded lazily, skipping removed tracks."""
+    client = MagicMock()
+    client.playlist_items.return_value = {
+        'items': [{'track': {'uri': 'spotify:track:track1'}}, {'track': None}],
+        'total': 2
+    }
+    
+    uris = iter_playlist_track_uris(client, 'playlist1')
+    
+    client.playlist_items.assert_not_called()
+    assert list(uris) == ['spotify:track:track1']
+
+def test_fetch_artist_genres():
+    """Test batched artist genre fetching."""
+    client = MagicMock()
+    client.artists.side_effect = lambda ids: {'artists': [{'id': a, 'genres': ['pop']} for a in ids]}
+    
+    genres = fetch_artist_genres(client, [f'artist{i}' for i in range(120)])
+    
+    assert len(genres) == 120
+    assert genres['artist0'] == ['pop']
+    assert client.artists.call_count == 3
+
 def test_fetch_audio_features_empty_list(mock_spotify_client):
     """Test fetching audio features with empty track list."""
     features = fetch_audio_features(mock_spotify_client, [])
@@ -100,4 +377,43 @@ def test_fetch_audio_features_error_handling(mock_spotify_client):
     mock_spotify_client.audio_features.side_effect = Exception("API Error")
     track_uris = ['spotify:track:track1']
     features = fetch_audio_features(mock_spotify_client, track_uris)
-    assert len(features) == 0  # Should return empty dict on error 
\ No newline at end of file
+    assert len(features) == 0  # Should return empty dict on error 
+
+def test_build_analysis_export():
+    """Test the export payload contains tracks and features."""
+    tracks = [
+        TrackMetadata(
+            id='track1',
+            name='Track 1',
+            artist='Artist 1',
+            artist_id='artist1',
+            album='Album 1',
+            duration_ms=180000,
+            popularity=80,
+            added_at='2024-01-01T00:00:00Z',
+            genres=['rock'],
+            uri='spotify:track:track1'
+        )
+    ]
+    features = {'spotify:track:track1': {'tempo': 120.0}}
+    
+    data = build_analysis_export(tracks, features)
+    
+    assert data['tracks'][0]['uri'] == 'spotify:track:track1'
+    assert data['tracks'][0]['genres'] == ['rock']
+    assert data['audio_features'] == features
+
+def test_shuffle_playlist_replaces_then_appends():
+    """Test that a shuffle replaces the first batch and appends the rest."""
+    client = MagicMock()
+    track_uris = [f'spotify:track:track{i}' for i in range(250)]
+    
+    with patch('core.get_playlist_track_uris', return_value=list(track_uris)):
+        shuffle_playlist(client, 'playlist1')
+    
+    client.playlist_replace_items.assert_called_once()
+    first = client.playlist_replace_items.call_args.args[1]
+    rest = [call.args[1] for call in client.playlist_add_items.call_args_list]
+    assert len(first) == 100
+    assert len(rest) == 2
+    assert sorted(first + [uri for batch in rest for uri in batch]) == sorted(track_uris)
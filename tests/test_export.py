@@ -5,7 +5,9 @@ Tests for export functionality of Spotify Playlist Enhancer.
 import pytest
 import json
 from unittest.mock import patch, mock_open
-from export import export_analysis
+from datetime import datetime
+import numpy as np
+from export import export_analysis, dumps_json
 
 def test_export_analysis():
     """Test analysis export functionality."""
@@ -40,11 +42,11 @@ def test_export_analysis():
         )
         
         # Verify file was opened in write mode
-        mock_file.assert_called_once_with('test_output.json', 'w')
+        mock_file.assert_called_once_with('test_output.json', 'wb')
         
         # Verify JSON was written correctly
         handle = mock_file()
-        written = ''.join(call.args[0] for call in handle.write.call_args_list)
+        written = b''.join(call.args[0] for call in handle.write.call_args_list)
         written_data = json.loads(written)
         assert written_data['track_count'] == 1
         assert written_data['audio_features'] == features
@@ -65,7 +67,7 @@ def test_export_analysis_minimal():
         filepath = export_analysis(features)
         
         handle = mock_file()
-        written = ''.join(call.args[0] for call in handle.write.call_args_list)
+        written = b''.join(call.args[0] for call in handle.write.call_args_list)
         written_data = json.loads(written)
         assert written_data['track_count'] == 1
         assert written_data['audio_features'] == features
@@ -87,4 +89,18 @@ def test_export_analysis_error_handling():
     
     with patch('builtins.open', mock_file), \
          pytest.raises(IOError):
-        export_analysis(features, filepath='test_output.json') 
\ No newline at end of file
+        export_analysis(features, filepath='test_output.json') 
+
+def test_dumps_json_handles_datetime_and_numpy():
+    """Test JSON encoding of datetimes and NumPy values."""
+    data = {
+        'added_at': datetime(2024, 1, 1, 12, 30),
+        'tempo': np.float32(120.5),
+        'counts': np.array([1, 2, 3])
+    }
+    
+    decoded = json.loads(dumps_json(data))
+    
+    assert decoded['added_at'].startswith('2024-01-01T12:30')
+    assert decoded['tempo'] == 120.5
+    assert decoded['counts'] == [1, 2, 3]